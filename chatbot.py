@@ -1,130 +1,490 @@
+import atexit
+import contextlib
 import json
+import logging
+import logging.handlers
+import mmap
 import os
+import queue
+import sys
 import threading
-import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
-from typing import List, Dict
-from config import ChatConfig
+from itertools import islice
+from typing import List, Dict, Optional, Callable
+from config import CONFIG
 from llm_client import get_llm_client
 from prompts.system_prompt import CHAT_PROMPT
-from vector_db_manager import VectorDBManager
+from vector_db_manager import VectorDBManager, QueryCache
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+
+# 对话热路径上的状态输出走日志队列，由后台监听线程写终端，避免print阻塞回复
+logger = logging.getLogger("chatbot")
+_log_listener = None
+_log_listener_lock = threading.Lock()
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """每条日志都写到当前的sys.stdout（prompt_toolkit的patch_stdout会在启动后替换它）"""
+    
+    def __init__(self):
+        logging.Handler.__init__(self)
+    
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+def _start_log_listener() -> None:
+    """为chatbot日志挂上QueueHandler，并启动后台QueueListener（只启动一次）"""
+    global _log_listener
+    with _log_listener_lock:
+        if _log_listener is not None:
+            return
+        log_queue = queue.Queue(-1)
+        _log_listener = logging.handlers.QueueListener(log_queue, _StdoutHandler())
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _log_listener.start()
+        atexit.register(_log_listener.stop)  # 进程退出时输出队列中剩余的日志
+
+
+def _dumps_record(record: Dict) -> bytes:
+    """序列化单条聊天记录为一行JSON（JSONL格式，优先使用orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+
+
+def _loads_record(line: bytes) -> Dict:
+    """解析一行JSON为聊天记录（优先使用orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def _dumps_history_json(records: List[Dict]) -> bytes:
+    """序列化完整聊天历史为带缩进的JSON数组（用于备份文件，优先使用orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(records, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(records, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _read_tail_lines(path: str, count: int) -> List[bytes]:
+    """用mmap从文件末尾向前查找换行，只读取最后count个非空行"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = []
+            end = len(mm)
+            while end > 0 and len(lines) < count:
+                start = mm.rfind(b"\n", 0, end) + 1
+                line = mm[start:end]
+                if line.strip():
+                    lines.append(line)
+                end = start - 1
+            lines.reverse()
+            return lines
+
+
+def _record_to_message(record: Dict) -> Optional[Dict]:
+    """将聊天记录转换为API消息格式，无法识别的记录返回None"""
+    if "user" in record:
+        return {"role": "user", "content": record["user"]}
+    if "assistant" in record:
+        return {"role": "assistant", "content": record["assistant"]}
+    return None
+
 
 class ChatBot:
     def __init__(self):
-        self.config = ChatConfig()
-        self.chat_history = []
+        self.config = CONFIG
+        _start_log_listener()
+        self.chat_history = deque(maxlen=self.config.MAX_HISTORY_LENGTH)
+        # 最近10条消息的预构建API格式（{"role", "content"}），随历史记录同步维护
+        self._recent_messages = deque(maxlen=10)
         self.chat_prompt = CHAT_PROMPT
+        # 固定不变的系统提示消息，只构建一次
+        self._base_messages = ({"role": "system", "content": self.chat_prompt},)
+        self._history_fp = None
+        self._ensure_history_dir()
         self.load_chat_history()
+        self._open_history_file()
+        
+        # 聊天历史后台写入线程：写操作入队后由后台线程批量落盘
+        self._save_queue = queue.Queue()
+        self._writer_thread = None
+        self._writer_stop_event = threading.Event()
+        self.start_history_writer()
+        atexit.register(self.stop_history_writer)  # 进程退出时写完剩余记录
         
         # 初始化LLM客户端
         self.llm_client = get_llm_client(self.config)
         
         # 初始化向量数据库管理器
         self.vector_db = VectorDBManager(self.config)
+        # 历史搜索结果缓存：相同的输入不再重复调用embedding和向量搜索，归档后清空
+        self._history_cache = QueryCache(
+            max_size=getattr(self.config, 'HISTORY_CACHE_SIZE', 512),
+            ttl=getattr(self.config, 'HISTORY_CACHE_TTL', 600)
+        )
+        
+        # 每轮对话都会用到的可选配置，初始化时读取一次
+        self._enable_history_search = getattr(self.config, 'ENABLE_HISTORY_SEARCH', True)
+        self._history_search_limit = getattr(self.config, 'HISTORY_SEARCH_LIMIT', 3)
+        self._min_history_search_len = getattr(self.config, 'MIN_HISTORY_SEARCH_LEN', 4)
+        self._archive_interval_seconds = getattr(self.config, 'ARCHIVE_INTERVAL_HOURS', 6) * 3600
+        self._history_search_timeout = getattr(self.config, 'HISTORY_SEARCH_TIMEOUT', 2.0)
+        
+        # 历史搜索线程池：搜索与写历史、构建消息并行，超时则本轮不带历史上下文
+        # （search_related_chat_history与QueryCache均可在多线程中调用）
+        self._search_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-search")
+        atexit.register(self._shutdown_search_executor)
         
         # 聊天运行状态
         self.running = False
         
+        # 特殊命令分发表（命令 -> 处理函数），按优先级注册，先注册者优先
+        self._command_handlers = {}
+        for commands, handler in (
+            (self.config.EXIT_COMMANDS, self._handle_exit_command),
+            (self.config.CLEAR_COMMANDS, self._handle_clear_command),
+            (getattr(self.config, 'ARCHIVE_COMMANDS', frozenset()), self._handle_archive_command),
+            (self.config.HELP_COMMANDS, self.show_help),
+        ):
+            for command in commands:
+                self._command_handlers.setdefault(command.lower(), handler)
+        
         # 归档相关
         self.archive_thread = None
         self.archive_running = False
+        self._archive_stop_event = threading.Event()  # 停止时唤醒归档线程
         
         # 启动自动归档任务
         if getattr(self.config, 'AUTO_ARCHIVE_ENABLED', True):
             self.start_archive_task()
     
     def load_chat_history(self):
-        """加载聊天历史"""
+        """加载聊天历史（JSONL格式，每行一条记录）"""
+        max_length = self.config.MAX_HISTORY_LENGTH
+        self._history_file_lines = 0  # 历史文件当前的记录行数，用于判断何时压缩
         try:
             if os.path.exists(self.config.CHAT_HISTORY_FILE):
-                with open(self.config.CHAT_HISTORY_FILE, 'r', encoding='utf-8') as f:
-                    self.chat_history = json.load(f)
+                # 最多取末尾2*MAX+1行用于统计行数，只解析最后MAX_HISTORY_LENGTH条
+                lines = _read_tail_lines(self.config.CHAT_HISTORY_FILE, 2 * max_length + 1)
+                self.chat_history = deque(maxlen=max_length)
+                skipped = 0
+                for line in lines[-max_length:]:
+                    # 异常退出可能留下写了一半的行，逐行解析并跳过无法解析的行
+                    try:
+                        record = _loads_record(line)
+                    except ValueError:
+                        record = None
+                    if isinstance(record, dict):
+                        self.chat_history.append(record)
+                    else:
+                        skipped += 1
+                if skipped:
+                    print(f"⚠️  跳过了 {skipped} 行无法解析的聊天历史")
+                self._history_file_lines = len(lines)
+                if self._history_file_lines > 2 * max_length:
+                    self._write_history_snapshot(self.chat_history)
+                    self._history_file_lines = len(self.chat_history)
+            else:
+                legacy_file = getattr(self.config, 'LEGACY_CHAT_HISTORY_FILE', None)
+                if legacy_file and os.path.exists(legacy_file):
+                    self._migrate_legacy_history(legacy_file)
         except Exception as e:
             print(f"⚠️  加载聊天历史失败: {e}")
-            self.chat_history = []
+            self.chat_history = deque(maxlen=max_length)
+        self._rebuild_recent_messages()
+        self._last_chat_dt = self._parse_last_chat_time()
+    
+    def _migrate_legacy_history(self, legacy_file: str):
+        """将旧版JSON数组格式的聊天历史迁移为JSONL文件（保留原文件）"""
+        if IJSON_AVAILABLE:
+            # 流式解析，内存中最多只保留MAX_HISTORY_LENGTH条记录
+            with open(legacy_file, 'rb') as f:
+                self.chat_history = deque(
+                    ijson.items(f, 'item', use_float=True),
+                    maxlen=self.config.MAX_HISTORY_LENGTH
+                )
+        else:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                self.chat_history = deque(json.load(f), maxlen=self.config.MAX_HISTORY_LENGTH)
+        self._write_history_snapshot(self.chat_history)
+        self._history_file_lines = len(self.chat_history)
+        print(f"📦 已将旧版聊天历史迁移到 {self.config.CHAT_HISTORY_FILE}")
+    
+    def _rebuild_recent_messages(self):
+        """根据聊天历史重建最近消息缓存"""
+        self._recent_messages.clear()
+        for record in islice(self.chat_history, max(0, len(self.chat_history) - 10), None):
+            message = _record_to_message(record)
+            if message:
+                self._recent_messages.append(message)
+    
+    def _ensure_history_dir(self):
+        """创建聊天历史文件所在目录（仅在初始化或目录被删除时调用）"""
+        os.makedirs(os.path.dirname(self.config.CHAT_HISTORY_FILE) or ".", exist_ok=True)
+    
+    def _open_history_file(self):
+        """以追加模式打开聊天历史文件，后续每轮对话只追加新记录"""
+        try:
+            try:
+                self._history_fp = open(self.config.CHAT_HISTORY_FILE, 'ab')
+            except FileNotFoundError:
+                self._ensure_history_dir()
+                self._history_fp = open(self.config.CHAT_HISTORY_FILE, 'ab')
+            
+            # 文件末尾是写了一半的行时先补换行，避免新记录拼接到该行上
+            if self._history_fp.tell() > 0:
+                with open(self.config.CHAT_HISTORY_FILE, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._history_fp.write(b"\n")
+                        self._history_fp.flush()
+        except Exception as e:
+            print(f"⚠️  打开聊天历史文件失败: {e}")
+            self._history_fp = None
+    
+    def close_history_file(self):
+        """关闭聊天历史文件"""
+        if self._history_fp:
+            self._history_fp.close()
+            self._history_fp = None
+    
+    def append_history_record(self, record: Dict):
+        """追加单条记录到聊天历史文件（交给后台线程写入）"""
+        self._submit_history_op(("append", record))
     
     def save_chat_history(self):
-        """保存聊天历史"""
+        """用内存中的聊天历史整体重写文件（仅在清除/归档/压缩时使用）"""
+        self._history_file_lines = len(self.chat_history)
+        self._submit_history_op(("rewrite", list(self.chat_history)))
+    
+    def _submit_history_op(self, op: tuple):
+        """提交写操作；后台线程未运行时直接同步写入"""
+        if self._writer_thread and self._writer_thread.is_alive():
+            self._save_queue.put(op)
+        else:
+            self._apply_history_ops([op])
+    
+    def _apply_history_ops(self, ops: List[tuple]):
+        """按顺序执行一批写操作，连续的追加记录合并为一次写入"""
+        pending_lines = []
+        for kind, payload in ops:
+            if kind == "append":
+                pending_lines.append(_dumps_record(payload))
+            else:
+                self._write_history_lines(pending_lines)
+                pending_lines = []
+                self._rewrite_history_file(payload)
+        self._write_history_lines(pending_lines)
+    
+    def _write_history_lines(self, lines: List[bytes]):
+        """将多行记录一次性追加到文件"""
+        if not lines or self._history_fp is None:
+            return
+        try:
+            self._history_fp.writelines(lines)
+            self._history_fp.flush()
+        except Exception as e:
+            print(f"⚠️  追加聊天历史失败: {e}")
+    
+    def _rewrite_history_file(self, records: List[Dict]):
+        """用给定记录整体重写聊天历史文件"""
         try:
-            os.makedirs(os.path.dirname(self.config.CHAT_HISTORY_FILE), exist_ok=True)
-            with open(self.config.CHAT_HISTORY_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.chat_history, f, ensure_ascii=False, indent=2)
+            self.close_history_file()
+            self._write_history_snapshot(records)
         except Exception as e:
             print(f"⚠️  保存聊天历史失败: {e}")
+        finally:
+            self._open_history_file()
+    
+    def _write_history_snapshot(self, records):
+        """先写临时文件再原子替换，保证历史文件不会处于写了一半的状态"""
+        tmp_file = self.config.CHAT_HISTORY_FILE + ".tmp"
+        data = b"".join(_dumps_record(record) for record in records)
+        try:
+            f = open(tmp_file, 'wb')
+        except FileNotFoundError:
+            self._ensure_history_dir()
+            f = open(tmp_file, 'wb')
+        with f:
+            f.write(data)
+        os.replace(tmp_file, self.config.CHAT_HISTORY_FILE)
+    
+    def start_history_writer(self):
+        """启动聊天历史后台写入线程"""
+        if self._writer_thread and self._writer_thread.is_alive():
+            return
+        
+        self._writer_stop_event.clear()
+        self._writer_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._writer_thread.start()
+    
+    def stop_history_writer(self):
+        """停止后台写入线程，写完队列中剩余的记录后关闭文件"""
+        if self._writer_thread and self._writer_thread.is_alive():
+            self._writer_stop_event.set()  # 结束合并窗口的等待，立即落盘
+            self._save_queue.put(None)  # 结束标记，排在所有待写操作之后
+            self._writer_thread.join()
+        self.close_history_file()
+    
+    def _shutdown_search_executor(self):
+        """关闭历史搜索线程池（可重复调用）"""
+        self._search_executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _flush_loop(self):
+        """后台写入线程：阻塞等待写操作，收到后等待一个合并窗口，再将窗口内的所有写操作一次落盘"""
+        flush_interval = getattr(self.config, 'HISTORY_FLUSH_INTERVAL', 0.5)
+        stopping = False
+        while not stopping:
+            op = self._save_queue.get()
+            if op is None:
+                break
+            ops = [op]
+            
+            # 停止时不再等待，直接写入
+            self._writer_stop_event.wait(flush_interval)
+            while True:
+                try:
+                    op = self._save_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if op is None:
+                    stopping = True
+                    break
+                ops.append(op)
+            
+            self._apply_history_ops(ops)
     
     def add_to_history(self, role: str, message: str):
         """添加对话到历史记录"""
-        self.chat_history.append({
-            "timestamp": datetime.now().isoformat(),
+        self._last_chat_dt = datetime.now()
+        record = {
+            "timestamp": self._last_chat_dt.isoformat(),
             role: message,
-        })
+        }
+        # deque设置了maxlen，超出长度时自动丢弃最旧的记录
+        self.chat_history.append(record)
+        self._recent_messages.append({"role": role, "content": message})
         
-        # 限制历史记录长度
-        if len(self.chat_history) > self.config.MAX_HISTORY_LENGTH:
-            self.chat_history = self.chat_history[-self.config.MAX_HISTORY_LENGTH:]
+        # 追加写入；文件行数超过内存上限的2倍时重写压缩，防止文件无限增长
+        self._history_file_lines += 1
+        if self._history_file_lines > 2 * self.config.MAX_HISTORY_LENGTH:
+            self.save_chat_history()
+        else:
+            self.append_history_record(record)
     
-    def get_chat_messages(self, user_input: str) -> List[Dict]:
-        """构建发送给API的消息列表"""
-        messages = [{"role": "system", "content": self.chat_prompt}]
-        
-        # 搜索相关的历史聊天记录（如果启用）
+    def _search_related_history(self, user_input: str) -> List[Dict]:
+        """搜索相关的历史聊天记录（如果启用），结果按规范化输入缓存"""
         related_history = []
-        if getattr(self.config, 'ENABLE_HISTORY_SEARCH', True):
+        normalized_input = user_input.strip().lower()
+        if (self._enable_history_search
+                and len(normalized_input) >= self._min_history_search_len
+                and normalized_input not in self._command_handlers):
             try:
                 if self.vector_db and self.vector_db.is_available:
-                    search_limit = getattr(self.config, 'HISTORY_SEARCH_LIMIT', 3)
-                    related_history = self.vector_db.search_related_chat_history(user_input, limit=search_limit)
+                    related_history = self._history_cache.get(normalized_input)
+                    if related_history is None:
+                        # 本轮输入的向量只计算一次（经embedding缓存），供历史搜索等使用
+                        query_embedding = self.vector_db.get_embedding(user_input)
+                        related_history = self.vector_db.search_related_chat_history(
+                            user_input, limit=self._history_search_limit,
+                            query_embedding=query_embedding
+                        )
+                        self._history_cache.put(normalized_input, related_history)
             except Exception as e:
-                print(f"⚠️  搜索历史记录失败: {e}")
+                logger.warning(f"⚠️  搜索历史记录失败: {e}")
+        return related_history
+    
+    def _wait_related_history(self, search_future: Future) -> List[Dict]:
+        """等待后台历史搜索结果，超时或出错时返回空列表，不拖慢回复"""
+        try:
+            return search_future.result(timeout=self._history_search_timeout)
+        except FutureTimeoutError:
+            logger.warning("⚠️  搜索历史记录超时，本轮不使用历史上下文")
+        except Exception as e:
+            logger.warning(f"⚠️  搜索历史记录失败: {e}")
+        return []
+    
+    def get_chat_messages(self, user_input: str, related_history: Optional[List[Dict]] = None) -> List[Dict]:
+        """构建发送给API的消息列表，未传入related_history时同步搜索相关历史"""
+        if related_history is None:
+            related_history = self._search_related_history(user_input)
         
-        # 如果找到相关的历史记录，添加到上下文中
+        # 如果找到相关的历史记录，作为系统消息添加到上下文中
+        context_messages = ()
         if related_history:
-            context_content = "📚 参考相关的历史对话:\n"
+            parts = ["📚 参考相关的历史对话:\n"]
             for i, record in enumerate(related_history, 1):
-                topic = record.get('topic', '未知主题')
-                summary = record.get('summary', '')
-                content_short = record.get('raw_content', '')[:400] + "..." if len(record.get('raw_content', '')) > 400 else record.get('raw_content', '')
-                similarity = record.get('score', 0)
-                
-                context_content += f"\n{i}. 主题: {topic} (相似度: {similarity:.2f}):\n"
-                context_content += f"   总结: {summary}\n"
-                context_content += f"   内容: {content_short}\n"
-            
-            context_content += "\n💡 请结合这些历史对话的上下文来理解用户的意图，并提供更准确和连贯的回答。\n"
+                raw_content = record.get('raw_content') or ''
+                content_short = raw_content[:400] + "..." if len(raw_content) > 400 else raw_content
+                parts.append(
+                    f"\n{i}. 主题: {record.get('topic', '未知主题')} (相似度: {record.get('score', 0):.2f}):\n"
+                    f"   总结: {record.get('summary', '')}\n"
+                    f"   内容: {content_short}\n"
+                )
+            parts.append("\n💡 请结合这些历史对话的上下文来理解用户的意图，并提供更准确和连贯的回答。\n")
+            context_content = "".join(parts)
             
             # 添加历史上下文作为系统消息
-            print("搜索到的相关历史上下文", context_content)
-            messages.append({"role": "system", "content": context_content})
-        
-        # 添加当前会话的历史对话（最近几轮）- 修正为单一消息格式
-        recent_history = self.chat_history[-10:]  # 取最近10条消息
-        for item in recent_history:
-            # 检查消息是否包含 user 或 assistant 字段
-            if "user" in item:
-                messages.append({"role": "user", "content": item["user"]})
-            elif "assistant" in item:
-                content = item.get("assistant", item.get("assistant", ""))
-                messages.append({"role": "assistant", "content": content})
-        
-        # 添加当前用户输入
-        messages.append({"role": "user", "content": user_input})
+            logger.info("搜索到的相关历史上下文 %s", context_content)
+            context_messages = ({"role": "system", "content": context_content},)
         
-        return messages
+        # 系统提示 + 历史上下文 + 当前会话最近10条消息（已预先构建） + 当前用户输入
+        return [
+            *self._base_messages,
+            *context_messages,
+            *self._recent_messages,
+            {"role": "user", "content": user_input},
+        ]
     
-    def get_response(self, user_input: str) -> str:
-        """获取机器人回复"""
+    def get_response(self, user_input: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """获取机器人回复，传入on_token时以流式方式逐段回调生成的文本"""
         try:
             if not self.llm_client.is_available:
                 return "❌ 抱歉，AI服务暂时不可用，请检查配置。"
             
+            # 先在后台发起历史搜索，与写入历史并行
+            search_future = self._search_executor.submit(self._search_related_history, user_input)
             self.add_to_history("user", user_input)
-            self.save_chat_history()
 
-            messages = self.get_chat_messages(user_input)            
-            response = self.llm_client.chat_completion(messages)
+            messages = self.get_chat_messages(user_input, self._wait_related_history(search_future))
+            if on_token is None:
+                response = self.llm_client.chat_completion(messages)
+            else:
+                parts = []
+                try:
+                    for delta in self.llm_client.chat_completion_stream(messages):
+                        parts.append(delta)
+                        on_token(delta)
+                except Exception as e:
+                    # 中途失败时另起一行提示，不完整的回复不写入历史
+                    if parts:
+                        print()
+                    print(f"⚠️  LLM流式调用失败: {e}")
+                    return "❌ 抱歉，回复中断了，请再试一次。"
+                response = "".join(parts).strip() or None
             
             self.add_to_history("assistant", response)
-            self.save_chat_history()
             
             if response:
                 return response
@@ -142,9 +502,9 @@ class ChatBot:
                 print("✅ 聊天历史已归档并清除")
                 return
         
-        self.chat_history = []
-        if os.path.exists(self.config.CHAT_HISTORY_FILE):
-            os.remove(self.config.CHAT_HISTORY_FILE)
+        self.chat_history.clear()
+        self._recent_messages.clear()
+        self.save_chat_history()
         print("✅ 聊天历史已清除")
     
     def show_help(self):
@@ -173,35 +533,44 @@ class ChatBot:
         print(help_text)
         return help_text
     
-    def process_message(self, user_input: str):
+    def process_message(self, user_input: str, on_token: Optional[Callable[[str], None]] = None):
         """处理用户消息"""
         # 检查特殊命令
-        if user_input.lower() in self.config.EXIT_COMMANDS:
-            print(f"\n嘿嘿～那我就不打扰你啦，记得想我哦～👋 {self.config.BOT_NAME}先走啦～")
-            self.running = False
-            return "再见！感谢使用聊天助手～👋"
-        
-        if user_input.lower() in self.config.CLEAR_COMMANDS:
-            self.clear_history()
-            return "✅ 聊天历史已清除"
-        
-        if user_input.lower() in getattr(self.config, 'ARCHIVE_COMMANDS', []):
-            if self.chat_history:
-                self.archive_chat_history()
-            else:
-                print("📝 当前没有聊天历史需要归档")
-            return "✅ 聊天历史已归档到向量数据库"
-        
-        if user_input.lower() in self.config.HELP_COMMANDS:
-            help_text = self.show_help()
-            return help_text
+        handler = self._command_handlers.get(user_input.lower())
+        if handler:
+            return handler()
         
         # 获取AI回复
-        response = self.get_response(user_input)        
+        response = self.get_response(user_input, on_token)        
         return response
     
+    def _handle_exit_command(self) -> str:
+        """处理退出命令"""
+        print(f"\n嘿嘿～那我就不打扰你啦，记得想我哦～👋 {self.config.BOT_NAME}先走啦～")
+        self.running = False
+        return "再见！感谢使用聊天助手～👋"
+    
+    def _handle_clear_command(self) -> str:
+        """处理清除历史命令"""
+        self.clear_history()
+        return "✅ 聊天历史已清除"
+    
+    def _handle_archive_command(self) -> str:
+        """处理归档命令"""
+        if self.chat_history:
+            self.archive_chat_history()
+        else:
+            print("📝 当前没有聊天历史需要归档")
+        return "✅ 聊天历史已归档到向量数据库"
+    
     def get_last_chat_time(self) -> datetime:
-        """获取最后一次聊天的时间"""
+        """获取最后一次聊天的时间（写入时缓存，无需重复解析时间戳）"""
+        if not self.chat_history:
+            return datetime.min
+        return self._last_chat_dt
+    
+    def _parse_last_chat_time(self) -> datetime:
+        """解析最后一条聊天记录的时间戳（仅在加载历史时调用）"""
         if not self.chat_history:
             return datetime.min
         
@@ -225,13 +594,17 @@ class ChatBot:
             return False
         
         # 检查是否超过归档间隔
-        archive_interval = getattr(self.config, 'ARCHIVE_INTERVAL_HOURS', 6)
         time_diff = datetime.now() - last_chat_time
         
-        return time_diff.total_seconds() >= archive_interval * 3600
+        return time_diff.total_seconds() >= self._archive_interval_seconds
     
     def backup_chat_history_to_file(self) -> str:
-        """将聊天历史备份到文件"""
+        """
+        将内存中的聊天历史备份到文件
+        
+        不链接或复制历史文件：该文件仍在追加写入，且可能包含尚未压缩掉的旧记录，
+        备份内容应与本次归档的记录一致
+        """
         try:
             backup_dir = getattr(self.config, 'ARCHIVE_BACKUP_DIR', 'data/archive')
             os.makedirs(backup_dir, exist_ok=True)
@@ -239,8 +612,8 @@ class ChatBot:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_file = os.path.join(backup_dir, f"chat_history_{timestamp}.json")
             
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(self.chat_history, f, ensure_ascii=False, indent=2)
+            with open(backup_file, 'wb') as f:
+                f.write(_dumps_history_json(list(self.chat_history)))
             
             print(f"✅ 聊天历史已备份到: {backup_file}")
             return backup_file
@@ -263,14 +636,18 @@ class ChatBot:
             # 2. 保存到向量数据库
             archive_timestamp = datetime.now().isoformat()
             success = self.vector_db.save_chat_history_archive(
-                self.chat_history, 
+                list(self.chat_history), 
                 archive_timestamp
             )
             
             if success:
+                # 向量库内容已变化，之前缓存的搜索结果失效
+                self._history_cache.clear()
+                
                 # 3. 清理聊天历史
                 history_count = len(self.chat_history)
-                self.chat_history = []
+                self.chat_history.clear()
+                self._recent_messages.clear()
                 self.save_chat_history()
                 
                 print(f"✅ 成功归档并清理了 {history_count} 条聊天记录")
@@ -292,6 +669,7 @@ class ChatBot:
             return
         
         self.archive_running = True
+        self._archive_stop_event.clear()
         self.archive_thread = threading.Thread(target=self._archive_worker, daemon=True)
         self.archive_thread.start()
         print("🗂️  自动归档任务已启动")
@@ -299,6 +677,7 @@ class ChatBot:
     def stop_archive_task(self):
         """停止后台归档任务"""
         self.archive_running = False
+        self._archive_stop_event.set()
         if self.archive_thread and self.archive_thread.is_alive():
             self.archive_thread.join(timeout=1)
         print("🗂️  自动归档任务已停止")
@@ -313,15 +692,13 @@ class ChatBot:
                     print("⏰ 检测到聊天历史需要归档...")
                     self.archive_chat_history()
                 
-                # 等待下次检查
-                for _ in range(check_interval):
-                    if not self.archive_running:
-                        break
-                    time.sleep(1)
+                # 等待下次检查，停止时立即唤醒
+                if self._archive_stop_event.wait(timeout=check_interval):
+                    break
                     
             except Exception as e:
                 print(f"❌ 归档任务出错: {e}")
-                time.sleep(60)  # 出错后等待1分钟再继续
+                self._archive_stop_event.wait(timeout=60)  # 出错后等待1分钟再继续
     
     def start_chat(self):
         """启动聊天（提供一个更清晰的入口方法）"""
@@ -332,6 +709,24 @@ class ChatBot:
         finally:
             self.running = False
             self.stop_archive_task()  # 停止归档任务
+            self.stop_history_writer()  # 写完剩余的聊天历史
+            self._shutdown_search_executor()  # 取消未开始的历史搜索，不等待进行中的搜索
+    
+    def _create_input_reader(self):
+        """
+        创建读取用户输入的函数及其输出上下文
+        
+        终端交互时使用prompt_toolkit，后台线程的输出不会打乱正在输入的行；
+        管道输入或未安装prompt_toolkit时退回内置input()
+        """
+        if sys.stdin.isatty():
+            try:
+                from prompt_toolkit import PromptSession
+                from prompt_toolkit.patch_stdout import patch_stdout
+                return PromptSession().prompt, patch_stdout()
+            except ImportError:
+                pass
+        return input, contextlib.nullcontext()
     
     def simple_chat(self):
         """简单的同步聊天模式"""
@@ -339,31 +734,48 @@ class ChatBot:
         print("� 提示：直接输入你的问题或想说的话，输入 '退出' 结束聊天")
         
         self.running = True
+        read_input, output_context = self._create_input_reader()
         
         try:
-            while self.running:
-                try:
-                    # 获取用户输入
-                    user_input = input(f"\n😊 你: ").strip()
-                    
-                    if not user_input:
-                        continue
-                    
-                    # 处理用户消息
-                    self.process_message(user_input)
-                        
-                except KeyboardInterrupt:
-                    print(f"\n\n嘿嘿～那我就不打扰你啦，记得想我哦～👋 {self.config.BOT_NAME}先走啦～")
-                    break
-                except Exception as e:
-                    print(f"\n❌ 处理消息时发生错误: {e}")
-                    
+            with output_context:
+                self._chat_loop(read_input)
         except Exception as e:
             print(f"\n❌ 程序发生错误: {e}")
         finally:
             self.running = False
             self.stop_archive_task()  # 停止归档任务
+            self.stop_history_writer()  # 写完剩余的聊天历史
+            self._shutdown_search_executor()  # 取消未开始的历史搜索，不等待进行中的搜索
             print("\n👋 聊天结束")
+    
+    def _chat_loop(self, read_input):
+        """读取用户输入并处理，直到退出"""
+        while self.running:
+            try:
+                # 获取用户输入
+                user_input = read_input(f"\n😊 你: ").strip()
+                
+                if not user_input:
+                    continue
+                
+                # 处理用户消息，AI回复边生成边输出
+                streamed = []
+                
+                def print_token(delta: str):
+                    if not streamed:
+                        print(f"\n🤖 {self.config.BOT_NAME}: ", end="")
+                    streamed.append(delta)
+                    print(delta, end="", flush=True)
+                
+                self.process_message(user_input, on_token=print_token)
+                if streamed:
+                    print()
+                    
+            except (KeyboardInterrupt, EOFError):
+                print(f"\n\n嘿嘿～那我就不打扰你啦，记得想我哦～👋 {self.config.BOT_NAME}先走啦～")
+                break
+            except Exception as e:
+                print(f"\n❌ 处理消息时发生错误: {e}")
 
 if __name__ == "__main__":
     bot = ChatBot()
@@ -6,6 +6,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class ChatConfig:
+    # 配置项均为类属性（导入时读取一次环境变量）；空__slots__使实例不带__dict__，全局共享同一实例CONFIG
+    __slots__ = ()
+
     # 基本设置
     BOT_NAME = "银月"
     VERSION = "1.0.0"
@@ -27,18 +30,20 @@ class ChatConfig:
     
     # 文件路径
     PROMPT_FILE = "prompts/system_prompt.txt"
-    CHAT_HISTORY_FILE = "data/chat_history.json"
+    CHAT_HISTORY_FILE = "data/chat_history.jsonl"  # JSONL格式，每轮对话追加一行
+    LEGACY_CHAT_HISTORY_FILE = "data/chat_history.json"  # 旧版JSON格式，首次加载时迁移为JSONL
+    HISTORY_FLUSH_INTERVAL = 0.5  # 聊天历史后台写入的合并窗口（秒），窗口内的写操作合并为一次落盘
     USER_KNOWLEDGE_FILE = "data/user_knowledge.json"
     KNOWLEDGE_TEMPLATE_FILE = "data/user_knowledge_template.json"
     
     # 界面设置
     WELCOME_MESSAGE = f"嗨～我是{BOT_NAME}啦，今天可以陪你聊天哦～你不会嫌我烦吧？🥺"
     
-    # 特殊命令
-    EXIT_COMMANDS = ["退出", "再见", "bye", "exit", "quit"]
-    CLEAR_COMMANDS = ["清除历史", "清空", "clear"]
-    ARCHIVE_COMMANDS = ["归档", "archive", "归档历史"]
-    HELP_COMMANDS = ["帮助", "help", "命令"]
+    # 特殊命令（frozenset，成员判断为O(1)哈希查找）
+    EXIT_COMMANDS = frozenset({"退出", "再见", "bye", "exit", "quit"})
+    CLEAR_COMMANDS = frozenset({"清除历史", "清空", "clear"})
+    ARCHIVE_COMMANDS = frozenset({"归档", "archive", "归档历史"})
+    HELP_COMMANDS = frozenset({"帮助", "help", "命令"})
     
     # 异步交互设置
     PROACTIVE_QUESTION_DELAY = 5  # 用户空闲多少秒后开始主动提问
@@ -58,10 +63,19 @@ class ChatConfig:
     # 历史搜索设置
     ENABLE_HISTORY_SEARCH = True  # 是否启用历史搜索
     HISTORY_SEARCH_LIMIT = 3  # 搜索历史记录的数量限制
+    MIN_HISTORY_SEARCH_LEN = 4  # 输入少于该字符数时不搜索历史（过短的输入检索不到有意义的内容）
     HISTORY_SIMILARITY_THRESHOLD = 0.5  # 相似度阈值
+    HISTORY_SEARCH_TIMEOUT = 2.0  # 等待历史搜索的最长时间（秒），超时则本轮回复不带历史上下文
+    HISTORY_CACHE_SIZE = 512  # 历史搜索结果缓存的最大条数
+    HISTORY_CACHE_TTL = 600  # 历史搜索结果缓存的有效期（秒）
     
     # Embedding设置 - 使用硅基流动的embedding API
     EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "BAAI/bge-m3")  # 硅基流动支持的embedding模型
     EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))  # bge-m3的嵌入维度是1024
+    EMBEDDING_CACHE_SIZE = 256  # 文本嵌入缓存的最大条数
+    EMBEDDING_CACHE_TTL = 3600  # 文本嵌入缓存的有效期（秒）
     # 或者qwen-embedding-8b，先用bge-m3，后续可以切换到qwen-embedding-8b
 
+
+# 全局共享的配置实例
+CONFIG = ChatConfig()
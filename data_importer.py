@@ -14,18 +14,33 @@ python data_importer.py data/sample.csv -t my_table -d --delimiter "," --encodin
 
 import asyncio
 import asyncpg
+import codecs
 import json
 import csv
 import os
+import re
 import logging
+import warnings
 from typing import Dict, Any, List, Optional, Union, Iterator
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from datetime import datetime, date
 import argparse
 import gc
+from contextlib import asynccontextmanager, contextmanager, suppress
+from itertools import chain, islice
 import ijson  # 新增：用于流式JSON解析
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from db_query_manager import load_db_config
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO, 
@@ -33,6 +48,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 按速度依次选择ijson后端：yajl2_c（C扩展） > yajl2_cffi > yajl2 > 纯Python
+for _backend_name in ('yajl2_c', 'yajl2_cffi', 'yajl2', 'python'):
+    try:
+        ijson_backend = ijson.get_backend(_backend_name)
+        break
+    except ImportError:
+        continue
+logger.info(f"ijson后端: {ijson_backend.backend_name}")
+
+JSON_BUF_SIZE = 1024 * 1024  # ijson每次读取的字节数（默认64KiB），减少read系统调用
+
+# 列名清理：非法字符替换为下划线，数字开头加col_前缀
+_SANITIZE_RE = re.compile(r'[^a-zA-Z0-9_]')
+_DIGIT_PREFIX_RE = re.compile(r'^(\d)')
+
+# CSV编码探测：采样字节数与候选编码（按优先级）
+ENCODING_SAMPLE_BYTES = 64 * 1024
+CSV_ENCODINGS = ['utf-8', 'gbk', 'gb2312', 'latin-1', 'cp1252']
+# Python编码名（codecs规范名）到PostgreSQL COPY ENCODING选项的映射
+_PG_ENCODINGS = {
+    'utf-8': 'UTF8',
+    'gbk': 'GBK',
+    'gb2312': 'EUC_CN',
+    'iso8859-1': 'LATIN1',
+    'cp1252': 'WIN1252',
+}
+
+_TRUE_VALUES = frozenset({'true', '1', 'yes', 't'})
+
+
+def _to_bool(value: Any) -> bool:
+    """转换为布尔值"""
+    return str(value).lower() in _TRUE_VALUES
+
+
+def _to_timestamp(value: Any) -> datetime:
+    """转换为datetime"""
+    if isinstance(value, (datetime, date)):
+        return value
+    return pd.to_datetime(str(value)).to_pydatetime()
+
+
+# 列类型 -> 单值转换函数（VARCHAR、TEXT等其余类型使用str）
+_CONVERTERS = {
+    "INTEGER": int,
+    "BIGINT": int,
+    "NUMERIC": float,
+    "BOOLEAN": _to_bool,
+    "TIMESTAMP": _to_timestamp,
+}
+
 class DataImporter:
     """数据导入器类"""
     
@@ -45,10 +111,12 @@ class DataImporter:
         """
         self.db_config = db_config
         self.connection_pool: Optional[asyncpg.Pool] = None
-        self.column_types_mapping: Dict[str, str] = {}
         self.large_file_threshold = 1024 * 1024 * 1024  # 1GB (仅用于CSV)
-        self.json_max_size = 10 * 1024 * 1024 * 1024  # 10GB (JSON文件最大限制)
-        self.chunk_size = 10000  # 大文件处理时的块大小
+        self.chunk_size = 10000  # 大文件处理时的块大小（无法按内存估算时使用）
+        self.max_chunk_bytes = 256 * 1024 * 1024  # 单个数据块占用内存的上限
+        self.pool_max_size = 10  # 连接池最大连接数，也是并发写入的批次数上限
+        self.arrow_block_size = 32 * 1024 * 1024  # pyarrow读取CSV时每块的字节数
+        self.prefetch_chunks = 4  # 后台线程预先解析好、等待写入的数据块数上限
     
     def get_file_size(self, file_path: str) -> int:
         """获取文件大小（字节）"""
@@ -58,9 +126,37 @@ class DataImporter:
         """判断是否为大文件（仅用于CSV）"""
         return self.get_file_size(file_path) > self.large_file_threshold
     
-    def is_json_too_large(self, file_path: str) -> bool:
-        """判断JSON文件是否超过限制大小"""
-        return self.get_file_size(file_path) > self.json_max_size
+    def _available_memory(self) -> Optional[int]:
+        """获取当前可用物理内存（字节），无法获取时返回None"""
+        try:
+            return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (AttributeError, ValueError, OSError):
+            return None
+    
+    def _calibrate_chunk_size(self, sample_df: pd.DataFrame) -> int:
+        """
+        根据样本的每行内存占用和可用内存估算数据块行数
+        
+        同时在内存中的数据块最多为预取队列长度+2（解析中、写入中各一个），
+        每块的目标大小为可用内存按块数平分后的1/4，且不超过max_chunk_bytes
+        
+        Args:
+            sample_df: 样本数据块
+            
+        Returns:
+            每个数据块的行数
+        """
+        if sample_df is None or sample_df.empty:
+            return self.chunk_size
+        bytes_per_row = sample_df.memory_usage(deep=True, index=False).sum() / len(sample_df)
+        # 转换后的行元组：每个值是一个Python对象（约64字节，含元组中的指针）
+        bytes_per_row += 64 * (len(sample_df.columns) + 1)
+        
+        target_bytes = self.max_chunk_bytes
+        available = self._available_memory()
+        if available:
+            target_bytes = min(target_bytes, available // (4 * (self.prefetch_chunks + 2)))
+        return max(1000, int(target_bytes // bytes_per_row))
     
     def stream_json_objects(self, file_path: str) -> Iterator[Dict[str, Any]]:
         """
@@ -74,30 +170,83 @@ class DataImporter:
         """
         with open(file_path, 'rb') as file:
             # 尝试解析数组格式的JSON
+            yielded = 0
             try:
-                parser = ijson.items(file, 'item')
+                parser = ijson_backend.items(file, 'item', use_float=True, buf_size=JSON_BUF_SIZE)
                 for obj in parser:
+                    yielded += 1
                     yield obj
             except ijson.JSONError:
-                # 如果不是数组格式，尝试解析单个对象
-                file.seek(0)
-                try:
-                    parser = ijson.items(file, '')
-                    for obj in parser:
-                        yield obj
-                except ijson.JSONError:
-                    # 最后尝试逐行解析
+                if yielded:
+                    raise
+            else:
+                if not yielded:
+                    # 空数组直接结束；单个对象同样不产出元素，按第一个解析事件区分
                     file.seek(0)
-                    for line_num, line in enumerate(file, 1):
-                        line = line.decode('utf-8').strip()
-                        if line:
-                            try:
-                                yield json.loads(line)
-                            except json.JSONDecodeError as e:
-                                logger.warning(f"跳过第{line_num}行，JSON解析错误: {e}")
+                    first_event = next(ijson_backend.parse(file, buf_size=JSON_BUF_SIZE))
+                    if first_event[1] == 'start_array':
+                        return
+            if yielded:
+                return
+            
+            # 不是数组格式：按顶层值解析（单个对象或每行一个对象的JSONL）
+            file.seek(0)
+            try:
+                parser = ijson_backend.items(
+                    file, '', multiple_values=True, use_float=True, buf_size=JSON_BUF_SIZE
+                )
+                for obj in parser:
+                    yielded += 1
+                    yield obj
+            except ijson.JSONError:
+                # 最后尝试逐行解析（跳过上面已成功解析的行）
+                file.seek(0)
+                skip = yielded
+                bad_lines = 0
+                for line_num, line in enumerate(file, 1):
+                    line = line.decode('utf-8').strip()
+                    if line:
+                        if skip:
+                            skip -= 1
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError as e:
+                            bad_lines += 1
+                            logger.debug("跳过第%d行，JSON解析错误: %s", line_num, e)
+                if bad_lines:
+                    logger.warning(f"跳过 {bad_lines} 行无法解析的JSON")
+    
+    def detect_encoding(self, file_path: str, encoding: str = 'utf-8') -> str:
+        """
+        根据文件头部探测CSV编码
+        
+        依次用候选编码解码文件前ENCODING_SAMPLE_BYTES字节，返回第一个能解码的编码，
+        避免逐个编码重新解析整个文件
+        
+        Args:
+            file_path: 文件路径
+            encoding: 优先尝试的编码
+            
+        Returns:
+            探测到的编码
+        """
+        with open(file_path, 'rb') as file:
+            head = file.read(ENCODING_SAMPLE_BYTES)
+        
+        for enc in dict.fromkeys([encoding] + CSV_ENCODINGS):
+            try:
+                # 增量解码，容忍采样末尾被截断的多字节字符
+                codecs.getincrementaldecoder(enc)().decode(head, final=False)
+            except (UnicodeDecodeError, LookupError):
+                continue
+            if enc != encoding:
+                logger.info(f"检测到文件编码: {enc}")
+            return enc
+        return encoding
     
     def stream_csv_chunks(self, file_path: str, delimiter: str = ',', 
-                         encoding: str = 'utf-8', chunk_size: int = None) -> Iterator[List[Dict[str, Any]]]:
+                         encoding: str = 'utf-8', chunk_size: int = None) -> Iterator[pd.DataFrame]:
         """
         流式读取CSV文件并返回数据块
         
@@ -108,79 +257,110 @@ class DataImporter:
             chunk_size: 每个块的行数
             
         Yields:
-            数据块（字典列表）
+            数据块（DataFrame）
         """
         if chunk_size is None:
             chunk_size = self.chunk_size
+        encoding = self.detect_encoding(file_path, encoding)
         
-        # 尝试不同的CSV解析参数
-        csv_params_list = [
-            # 标准参数
-            {
-                'delimiter': delimiter,
-                'encoding': encoding,
-                'chunksize': chunk_size,
-                'na_filter': False,
-                'quoting': 1,  # QUOTE_ALL
-                'on_bad_lines': 'skip'  # 跳过坏行
-            },
-            # 更宽松的参数
-            {
-                'delimiter': delimiter,
-                'encoding': encoding,
-                'chunksize': chunk_size,
-                'na_filter': False,
-                'quoting': 3,  # QUOTE_NONE
-                'on_bad_lines': 'skip',
-                'error_bad_lines': False,
-                'warn_bad_lines': True
-            },
-            # 最宽松的参数
-            {
-                'delimiter': delimiter,
-                'encoding': encoding,
-                'chunksize': chunk_size,
-                'na_filter': False,
-                'quoting': 3,  # QUOTE_NONE
-                'on_bad_lines': 'skip',
-                'engine': 'python',  # 使用Python引擎，更宽松
-                'skipinitialspace': True
-            }
-        ]
-        
-        # 尝试不同编码
-        encodings_to_try = [encoding, 'utf-8', 'gbk', 'gb2312', 'latin-1', 'cp1252']
+        # 优先使用pyarrow（多线程C++解析），失败时回退到pandas
+        if PYARROW_AVAILABLE:
+            yielded = False
+            try:
+                for chunk_df in self._stream_csv_chunks_arrow(file_path, delimiter, encoding, chunk_size):
+                    yielded = True
+                    yield chunk_df
+                return
+            except Exception as e:
+                if yielded:
+                    raise
+                logger.warning(f"pyarrow解析CSV失败，回退到pandas: {e}")
         
-        for enc in encodings_to_try:
-            for params in csv_params_list:
-                try:
-                    params['encoding'] = enc
-                    logger.info(f"尝试使用编码 {enc} 和解析参数: quoting={params.get('quoting')}, engine={params.get('engine', 'c')}")
-                    
-                    chunk_reader = pd.read_csv(file_path, **params)
-                    
-                    logger.info(f"成功使用编码 {enc} 读取文件")
-                    
-                    for chunk_df in chunk_reader:
-                        # 清理列名中的特殊字符
-                        chunk_df.columns = [str(col).strip() for col in chunk_df.columns]
-                        # 将DataFrame转换为字典列表
-                        chunk_data = chunk_df.to_dict('records')
-                        yield chunk_data
-                    return  # 成功读取，退出
-                    
-                except Exception as e:
-                    logger.warning(f"编码 {enc} 参数组合失败: {e}")
-                    continue
+        # pandas单次解析（C引擎，全字符串列），失败时回退到手动逐行解析
+        yielded = False
+        try:
+            with pd.read_csv(file_path, delimiter=delimiter, encoding=encoding,
+                             chunksize=chunk_size, dtype=str, na_filter=False,
+                             on_bad_lines='skip') as chunk_reader:
+                logger.info(f"使用pandas读取CSV文件，编码 {encoding}")
+                for chunk_df in chunk_reader:
+                    yielded = True
+                    yield chunk_df
+            return
+        except Exception as e:
+            if yielded:
+                raise
+            logger.warning(f"pandas解析CSV失败，尝试手动逐行解析: {e}")
         
-        # 如果所有方法都失败，尝试手动逐行解析
-        logger.warning("标准pandas解析失败，尝试手动逐行解析")
         try:
-            yield from self._manual_csv_parse(file_path, delimiter, chunk_size)
+            for chunk_data in self._manual_csv_parse(file_path, delimiter, chunk_size, encoding):
+                yield pd.DataFrame.from_records(chunk_data)
         except Exception as e:
             raise ValueError(f"无法解析CSV文件，所有方法都失败: {e}")
     
-    def _manual_csv_parse(self, file_path: str, delimiter: str = ',', chunk_size: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+    def _stream_csv_chunks_arrow(self, file_path: str, delimiter: str, 
+                                 encoding: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        使用pyarrow流式读取CSV文件
+        
+        所有列按字符串读取，列类型仍由infer_column_type_series统一推断，
+        避免pyarrow按第一块推断的类型在后续块中解析失败
+        
+        Args:
+            file_path: CSV文件路径
+            delimiter: 分隔符
+            encoding: 编码
+            chunk_size: 每个块的最大行数
+            
+        Yields:
+            数据块（DataFrame）
+        """
+        read_options = pacsv.ReadOptions(block_size=self.arrow_block_size, encoding=encoding)
+        # 引号内的换行可能跨越分块边界，需要newlines_in_values（否则分块与解析不同步）
+        parse_options = pacsv.ParseOptions(delimiter=delimiter, newlines_in_values=True,
+                                           invalid_row_handler=lambda row: 'skip')
+        
+        # 先读取表头，再以全字符串列重新打开
+        with pacsv.open_csv(file_path, read_options=read_options, parse_options=parse_options) as reader:
+            column_names = reader.schema.names
+        convert_options = pacsv.ConvertOptions(column_types={name: pa.string() for name in column_names})
+        
+        # 字段数量不符的行：与pandas一致，字段不足的行补齐空值，字段过多的行跳过
+        short_rows = []
+        skipped_rows = []
+        
+        def handle_invalid_row(row) -> str:
+            if row.actual_columns < row.expected_columns:
+                short_rows.append(row.text)
+            else:
+                skipped_rows.append(row.number)
+            return 'skip'
+        
+        parse_options = pacsv.ParseOptions(delimiter=delimiter, newlines_in_values=True,
+                                           invalid_row_handler=handle_invalid_row)
+        
+        logger.info(f"使用pyarrow读取CSV文件，编码 {encoding}")
+        with pacsv.open_csv(file_path, read_options=read_options, parse_options=parse_options,
+                            convert_options=convert_options) as reader:
+            for batch in reader:
+                for offset in range(0, batch.num_rows, chunk_size):
+                    chunk_df = batch.slice(offset, chunk_size).to_pandas()
+                    yield chunk_df
+                
+                # 每块汇总输出一次异常行日志，补齐后的行作为单独的数据块返回
+                if short_rows or skipped_rows:
+                    logger.warning(f"本块跳过 {len(skipped_rows)} 行，补齐 {len(short_rows)} 行")
+                    padded = [
+                        values + [''] * (len(column_names) - len(values))
+                        for values in csv.reader(short_rows, delimiter=delimiter)
+                    ]
+                    short_rows.clear()
+                    skipped_rows.clear()
+                    if padded:
+                        yield pd.DataFrame(padded, columns=column_names)
+    
+    def _manual_csv_parse(self, file_path: str, delimiter: str = ',', chunk_size: int = 10000,
+                          encoding: str = 'utf-8') -> Iterator[List[Dict[str, Any]]]:
         """
         手动逐行解析CSV文件（处理格式不规范的情况）
         
@@ -188,77 +368,74 @@ class DataImporter:
             file_path: CSV文件路径
             delimiter: 分隔符
             chunk_size: 每个块的行数
+            encoding: 优先尝试的编码
             
         Yields:
             数据块（字典列表）
         """
-        import csv
-        from io import StringIO
-        
         # 尝试不同编码
-        for encoding in ['utf-8', 'gbk', 'gb2312', 'latin-1', 'cp1252']:
+        for encoding in dict.fromkeys([encoding] + CSV_ENCODINGS):
             try:
-                with open(file_path, 'r', encoding=encoding, errors='ignore') as file:
+                with open(file_path, 'r', encoding=encoding, errors='ignore', newline='') as file:
                     logger.info(f"手动解析使用编码: {encoding}")
+                    # csv模块的C实现负责分隔符、引号和转义的处理
+                    reader = csv.reader(file, delimiter=delimiter)
                     
                     # 读取第一行作为头部
-                    first_line = file.readline().strip()
-                    if not first_line:
+                    headers = next(reader, None)
+                    if not headers:
                         continue
                     
                     # 解析头部
-                    headers = [col.strip().strip('"').strip("'") for col in first_line.split(delimiter)]
+                    headers = [col.strip() for col in headers]
                     num_columns = len(headers)
                     logger.info(f"检测到 {num_columns} 列: {headers[:5]}...")  # 只显示前5列
                     
                     chunk_data = []
-                    line_num = 1
+                    # 异常行按块计数，每块汇总输出一次日志
+                    skipped = truncated = padded = 0
                     
-                    for line in file:
-                        line_num += 1
-                        line = line.strip()
-                        if not line:
-                            continue
-                        
+                    while True:
                         try:
-                            # 分割行
-                            values = line.split(delimiter)
-                            
-                            # 处理字段数量不匹配的情况
-                            if len(values) != num_columns:
-                                # 如果字段太多，截断
-                                if len(values) > num_columns:
-                                    values = values[:num_columns]
-                                    logger.debug(f"第{line_num}行字段过多，已截断")
-                                # 如果字段太少，补充空值
-                                else:
-                                    values.extend([''] * (num_columns - len(values)))
-                                    logger.debug(f"第{line_num}行字段不足，已补充空值")
-                            
-                            # 清理值
-                            cleaned_values = []
-                            for val in values:
-                                val = val.strip().strip('"').strip("'")
-                                cleaned_values.append(val if val else None)
-                            
-                            # 创建行字典
-                            row_dict = dict(zip(headers, cleaned_values))
-                            chunk_data.append(row_dict)
-                            
-                            # 当达到块大小时返回数据
-                            if len(chunk_data) >= chunk_size:
-                                yield chunk_data
-                                chunk_data = []
-                                
-                        except Exception as e:
-                            logger.warning(f"跳过第{line_num}行，解析错误: {e}")
+                            values = next(reader)
+                        except StopIteration:
+                            break
+                        except csv.Error as e:
+                            skipped += 1
+                            logger.debug("跳过第%d行，解析错误: %s", reader.line_num, e)
                             continue
+                        if not values:
+                            continue
+                        
+                        # 处理字段数量不匹配的情况
+                        if len(values) != num_columns:
+                            # 如果字段太多，截断
+                            if len(values) > num_columns:
+                                values = values[:num_columns]
+                                truncated += 1
+                            # 如果字段太少，补充空值
+                            else:
+                                values.extend([''] * (num_columns - len(values)))
+                                padded += 1
+                        
+                        # 创建行字典（空字段为None）
+                        chunk_data.append(dict(zip(headers, [val or None for val in values])))
+                        
+                        # 当达到块大小时返回数据
+                        if len(chunk_data) >= chunk_size:
+                            if skipped or truncated or padded:
+                                logger.warning(f"本块跳过 {skipped} 行，截断 {truncated} 行，补齐 {padded} 行")
+                                skipped = truncated = padded = 0
+                            yield chunk_data
+                            chunk_data = []
                     
                     # 返回最后的数据块
+                    if skipped or truncated or padded:
+                        logger.warning(f"本块跳过 {skipped} 行，截断 {truncated} 行，补齐 {padded} 行")
                     if chunk_data:
                         yield chunk_data
                     
-                    logger.info(f"手动解析完成，共处理 {line_num} 行")
+                    logger.info(f"手动解析完成，共处理 {reader.line_num} 行")
                     return  # 成功解析，退出
                     
             except Exception as e:
@@ -273,7 +450,7 @@ class DataImporter:
             self.connection_pool = await asyncpg.create_pool(
                 **self.db_config,
                 min_size=2,
-                max_size=10,
+                max_size=self.pool_max_size,
                 command_timeout=60
             )
             logger.info("数据库连接池初始化成功")
@@ -308,8 +485,8 @@ class DataImporter:
         # 分析每列的数据类型
         column_types = {}
         for col in all_columns:
-            values = [row.get(col) for row in sample_data]
-            column_types[col] = self.infer_column_type(values)
+            values = pd.Series([row.get(col) for row in sample_data], dtype=object)
+            column_types[col] = self.infer_column_type_series(values)
         
         return column_types
 
@@ -323,60 +500,58 @@ class DataImporter:
         Returns:
             PostgreSQL列类型
         """
-        # 过滤掉None值
-        non_null_values = [v for v in values if v is not None and str(v).strip() != '']
+        return self.infer_column_type_series(pd.Series(values, dtype=object))
+    
+    def infer_column_type_series(self, series: pd.Series) -> str:
+        """
+        根据整列数据推断列类型（向量化探测，不逐个值尝试转换）
         
-        if not non_null_values:
+        Args:
+            series: 列数据
+            
+        Returns:
+            PostgreSQL列类型
+        """
+        # 过滤掉空值
+        raw = series.dropna().astype(str)
+        stripped = raw.str.strip()
+        non_empty = stripped != ''
+        raw, stripped = raw[non_empty], stripped[non_empty]
+        
+        if stripped.empty:
             return "TEXT"
         
-        # 检查是否为整数
-        try:
-            int_values = []
-            for val in non_null_values:
-                int_val = int(val)
-                int_values.append(int_val)
-            
-            # 检查是否在PostgreSQL INTEGER范围内 (-2,147,483,648 到 2,147,483,647)
-            min_int32 = -2147483648
-            max_int32 = 2147483647
-            
-            if all(min_int32 <= val <= max_int32 for val in int_values):
-                return "INTEGER"
-            else:
-                # 超出int32范围，检查是否在bigint范围内
-                min_int64 = -9223372036854775808
-                max_int64 = 9223372036854775807
-                if all(min_int64 <= val <= max_int64 for val in int_values):
+        numbers = pd.to_numeric(stripped, errors='coerce')
+        if numbers.notna().all():
+            # 检查是否为整数，并按取值范围选择INTEGER/BIGINT
+            if (numbers % 1 == 0).all():
+                min_value, max_value = numbers.min(), numbers.max()
+                if -2147483648 <= min_value and max_value <= 2147483647:
+                    return "INTEGER"
+                if -9223372036854775808 <= min_value and max_value <= 9223372036854775807:
                     return "BIGINT"
-                else:
-                    # 超出bigint范围，使用文本类型
-                    return "TEXT"
-        except (ValueError, TypeError):
-            pass
-        
-        # 检查是否为浮点数
-        try:
-            for val in non_null_values:
-                float(val)
+                # 超出bigint范围，使用文本类型
+                return "TEXT"
+            # 浮点数
             return "NUMERIC"
-        except (ValueError, TypeError):
-            pass
         
         # 检查是否为布尔值
-        bool_values = {'true', 'false', '1', '0', 'yes', 'no', 't', 'f'}
-        if all(str(val).lower() in bool_values for val in non_null_values):
+        bool_values = ('true', 'false', '1', '0', 'yes', 'no', 't', 'f')
+        if stripped.str.lower().isin(bool_values).all():
             return "BOOLEAN"
         
-        # 检查是否为日期时间
-        for val in non_null_values[:5]:  # 只检查前5个值
-            try:
-                pd.to_datetime(str(val))
-                return "TIMESTAMP"
-            except:
-                continue
+        # 检查是否为日期时间（只检查前50个值，统一格式解析失败的再逐个解析）
+        head = stripped.head(50)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            parsed = pd.to_datetime(head, errors='coerce')
+            if parsed.isna().any():
+                parsed = head.map(lambda value: pd.to_datetime(value, errors='coerce'))
+        if parsed.notna().all():
+            return "TIMESTAMP"
         
         # 检查字符串长度
-        max_length = max(len(str(val)) for val in non_null_values)
+        max_length = raw.str.len().max()
         if max_length <= 255:
             return f"VARCHAR({max_length + 50})"  # 留一些余量
         else:
@@ -393,11 +568,9 @@ class DataImporter:
             清理后的列名
         """
         # 替换特殊字符为下划线
-        import re
-        name = re.sub(r'[^a-zA-Z0-9_]', '_', str(name))
+        name = _SANITIZE_RE.sub('_', str(name))
         # 确保以字母或下划线开头
-        if name and name[0].isdigit():
-            name = f"col_{name}"
+        name = _DIGIT_PREFIX_RE.sub(r'col_\1', name)
         # 转换为小写
         name = name.lower()
         # 处理空字符串
@@ -405,6 +578,22 @@ class DataImporter:
             name = "unnamed_column"
         return name
     
+    def sanitize_columns(self, columns: pd.Index) -> pd.Index:
+        """
+        批量清理列名（规则同sanitize_column_name，额外去除首尾空白）
+        
+        Args:
+            columns: 原始列名
+            
+        Returns:
+            清理后的列名，顺序与输入一致
+        """
+        cleaned = (pd.Index(columns).astype(str).str.strip()
+                   .str.replace(_SANITIZE_RE, '_', regex=True)
+                   .str.replace(_DIGIT_PREFIX_RE, r'col_\1', regex=True)
+                   .str.lower())
+        return cleaned.where(cleaned != '', 'unnamed_column')
+    
     def convert_value_by_type(self, value: Any, column_type: str) -> Any:
         """
         根据列类型转换值
@@ -420,62 +609,291 @@ class DataImporter:
             return None
         
         try:
-            if column_type == "INTEGER":
-                return int(value)
-            elif column_type == "BIGINT":
-                return int(value)
-            elif column_type == "NUMERIC":
-                return float(value)
-            elif column_type == "BOOLEAN":
-                str_val = str(value).lower()
-                return str_val in {'true', '1', 'yes', 't'}
-            elif column_type == "TIMESTAMP":
-                if isinstance(value, (datetime, date)):
-                    return value
-                # 尝试解析字符串为datetime
-                return pd.to_datetime(str(value)).to_pydatetime()
-            else:
-                # VARCHAR, TEXT等字符串类型
-                return str(value)
+            return _CONVERTERS.get(column_type, str)(value)
         except Exception as e:
-            logger.warning(f"值转换失败 {value} -> {column_type}: {e}")
+            # 失败次数由调用方汇总输出
+            logger.debug("值转换失败 %r -> %s: %s", value, column_type, e)
             return None
+
+    def convert_series_by_type(self, series: pd.Series, column_type: str) -> np.ndarray:
+        """
+        按列类型整列转换值（向量化，结果与逐个调用convert_value_by_type一致）
+        
+        Args:
+            series: 原始列
+            column_type: PostgreSQL列类型
+            
+        Returns:
+            转换后的object数组，空值为None
+        """
+        # 空值掩码按列计算一次（numpy布尔数组），逐值不再判断空值
+        null_mask = series.isna().to_numpy()
+        if pd.api.types.is_string_dtype(series) or series.dtype == object:
+            null_mask = null_mask | (series.astype(str).str.strip() == '').to_numpy()
+        not_null = ~null_mask
+        
+        result = np.full(len(series), None, dtype=object)
+        values = series[not_null]
+        if values.empty:
+            return result
+        
+        def report_failed(failed_count: int):
+            # 转换失败的值按列汇总，每个数据块输出一次日志
+            if failed_count:
+                logger.warning(f"列 {series.name} 有 {failed_count} 个值无法转换为 {column_type}，已写入NULL")
+        
+        def convert_each(part: pd.Series) -> list:
+            # 向量化无法处理的值逐个转换
+            converted_part = [self.convert_value_by_type(value, column_type) for value in part]
+            report_failed(converted_part.count(None))
+            return converted_part
+        
+        converted = np.empty(len(values), dtype=object)
+        if column_type in ("INTEGER", "BIGINT"):
+            numbers = pd.to_numeric(values, errors='coerce')
+            if numbers.dtype.kind in 'iu':
+                converted[:] = numbers.to_numpy().tolist()
+            elif (numbers.dtype.kind == 'f' and numbers.notna().all()
+                  and (numbers % 1 == 0).all() and numbers.abs().max() < 2 ** 53):
+                converted[:] = numbers.to_numpy(dtype='int64').tolist()
+            else:
+                converted[:] = convert_each(values)
+        elif column_type == "NUMERIC":
+            numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+            failed = np.isnan(numbers)
+            converted[:] = numbers.tolist()
+            converted[failed] = None
+            report_failed(int(failed.sum()))
+        elif column_type == "BOOLEAN":
+            converted[:] = values.astype(str).str.lower().isin(_TRUE_VALUES).to_numpy().tolist()
+        elif column_type == "TIMESTAMP":
+            with warnings.catch_warnings():
+                # 无法推断统一格式时pandas会逐个解析并告警，每个数据块都会触发
+                warnings.simplefilter('ignore', UserWarning)
+                parsed = pd.to_datetime(values, errors='coerce')
+            failed = parsed.isna().to_numpy()
+            converted[~failed] = [ts.to_pydatetime() for ts in parsed[~failed]]
+            if failed.any():
+                converted[failed] = convert_each(values[failed])
+        else:
+            # VARCHAR, TEXT等字符串类型
+            converted[:] = values.astype(str).tolist()
+        
+        result[not_null] = converted
+        return result
     
-    async def create_table_from_sample(self, table_name: str, sample_data: List[Dict[str, Any]], 
+    def _build_schema(self, column_mapping: Dict[str, str], column_types: Dict[str, str]) -> tuple:
+        """
+        按列顺序预先确定每列的清理后列名和类型，导入过程中不再查找映射
+        
+        Args:
+            column_mapping: 原始列名到清理后列名的映射
+            column_types: 清理后列名到列类型的映射
+            
+        Returns:
+            (原始列名, 清理后列名, 列类型) 元组组成的元组
+        """
+        schema = []
+        for original_col, clean_col in column_mapping.items():
+            column_type = column_types.get(clean_col, "TEXT")
+            schema.append((original_col, clean_col, column_type))
+        return tuple(schema)
+    
+    def _convert_dataframe(self, df: pd.DataFrame, schema: tuple) -> List[tuple]:
+        """
+        按列类型整列转换DataFrame
+        
+        Args:
+            df: 数据块
+            schema: _build_schema生成的列定义
+            
+        Returns:
+            值元组列表，元组内顺序与schema一致
+        """
+        columns = []
+        for original_col, _, column_type in schema:
+            if original_col not in df.columns:
+                columns.append([None] * len(df))
+                continue
+            columns.append(self.convert_series_by_type(df[original_col], column_type).tolist())
+        return list(zip(*columns))
+
+    def _convert_records(self, records: List[Dict[str, Any]], schema: tuple) -> List[tuple]:
+        """
+        按列类型整列转换字典列表（先按列取值，再与_convert_dataframe一样整列转换）
+        
+        Args:
+            records: 数据行（字典列表）
+            schema: _build_schema生成的列定义
+            
+        Returns:
+            值元组列表，元组内顺序与schema一致
+        """
+        columns = []
+        for original_col, _, column_type in schema:
+            # object类型保留原始Python值（大整数不会先被转成float）
+            values = pd.Series([row.get(original_col) for row in records], dtype=object, name=original_col)
+            columns.append(self.convert_series_by_type(values, column_type).tolist())
+        return list(zip(*columns))
+
+    async def _copy_batches(self, table_name: str, columns: List[str], 
+                            batches: List[List[tuple]]) -> int:
+        """
+        并发写入多个批次，每个批次占用连接池中的一个连接执行COPY
+        
+        Args:
+            table_name: 目标表名
+            columns: 目标列（顺序与值元组一致）
+            batches: 批次列表，每个批次为值元组列表
+            
+        Returns:
+            写入的总行数
+        """
+        semaphore = asyncio.Semaphore(self.pool_max_size)
+        
+        async def copy_batch(records: List[tuple]) -> int:
+            async with semaphore, self.connection_pool.acquire() as conn:
+                async with conn.transaction():
+                    # 提交时不等待WAL落盘
+                    await conn.execute("SET LOCAL synchronous_commit = OFF")
+                    await conn.copy_records_to_table(
+                        table_name, records=records, columns=columns, timeout=60
+                    )
+            return len(records)
+        
+        counts = await asyncio.gather(*(copy_batch(records) for records in batches))
+        return sum(counts)
+    
+    @asynccontextmanager
+    async def _prefetch_in_thread(self, iterator: Iterator, maxsize: int):
+        """
+        在线程池中推进同步迭代器（解析、转换等CPU工作），经有界队列交给事件循环，
+        使下一块的解析与当前块的数据库写入重叠
+        
+        Args:
+            iterator: 同步迭代器
+            maxsize: 队列中最多缓存的元素数
+            
+        Yields:
+            按原顺序产出元素的异步迭代器
+        """
+        queue = asyncio.Queue(maxsize=maxsize)
+        loop = asyncio.get_running_loop()
+        done = object()
+        
+        async def produce():
+            while True:
+                try:
+                    item = await loop.run_in_executor(None, next, iterator, done)
+                except Exception as e:
+                    await queue.put((done, e))
+                    return
+                await queue.put((item, None))
+                if item is done:
+                    return
+        
+        async def items():
+            while True:
+                item, error = await queue.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    return
+                yield item
+        
+        producer = asyncio.create_task(produce())
+        try:
+            yield items()
+        finally:
+            producer.cancel()
+            with suppress(asyncio.CancelledError):
+                await producer
+    
+    @contextmanager
+    def _gc_paused(self):
+        """
+        导入期间暂停分代垃圾回收
+        
+        导入数据不产生循环引用，块数据在del后由引用计数立即释放；
+        大量新建的元组会频繁触发分代回收扫描，导入结束后恢复原状态
+        """
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            yield
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    
+    @asynccontextmanager
+    async def _copy_session(self, table_name: str, columns: List[str], use_transaction: bool = True):
+        """
+        批次写入会话，产出写入函数write_batches(batches) -> 写入行数
+        
+        use_transaction为True时，所有批次在同一连接的单个事务中依次COPY，失败整体回滚；
+        否则各批次分别在连接池的多个连接上并发COPY（见_copy_batches）。
+        两种方式都关闭synchronous_commit，提交时不等待WAL落盘。
+        
+        Args:
+            table_name: 目标表名
+            columns: 目标列（顺序与值元组一致）
+            use_transaction: 是否使用单个事务
+        """
+        if not use_transaction:
+            async def write_batches(batches: List[List[tuple]]) -> int:
+                return await self._copy_batches(table_name, columns, batches)
+            yield write_batches
+            return
+        
+        async with self.connection_pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SET LOCAL synchronous_commit = OFF")
+                
+                async def write_batches(batches: List[List[tuple]]) -> int:
+                    written = 0
+                    for records in batches:
+                        await conn.copy_records_to_table(
+                            table_name, records=records, columns=columns, timeout=60
+                        )
+                        written += len(records)
+                    return written
+                yield write_batches
+    
+    async def create_table_from_sample(self, table_name: str, 
+                                     sample_data: Union[List[Dict[str, Any]], pd.DataFrame], 
                                      drop_if_exists: bool = False) -> tuple:
         """
         根据样本数据创建表
         
         Args:
             table_name: 表名
-            sample_data: 样本数据
+            sample_data: 样本数据（字典列表或DataFrame）
             drop_if_exists: 是否删除已存在的表
             
         Returns:
-            (CREATE TABLE语句, 列映射)
+            (CREATE TABLE语句, 列映射, 列类型映射)
         """
-        if not sample_data:
+        if len(sample_data) == 0:
             raise ValueError("样本数据为空，无法创建表")
         
-        # 获取所有列名
-        all_columns = set()
-        for row in sample_data:
-            all_columns.update(row.keys())
+        # 按列取出样本值：DataFrame直接按列读取，字典列表需要汇总所有行的键
+        if isinstance(sample_data, pd.DataFrame):
+            column_values = {col: sample_data[col] for col in sample_data.columns}
+        else:
+            all_columns = set()
+            for row in sample_data:
+                all_columns.update(row.keys())
+            column_values = {
+                col: pd.Series([row.get(col) for row in sample_data], dtype=object) for col in all_columns
+            }
         
         # 清理列名
-        column_mapping = {}
-        for col in all_columns:
-            clean_col = self.sanitize_column_name(col)
-            column_mapping[col] = clean_col
+        column_mapping = dict(zip(column_values, self.sanitize_columns(list(column_values))))
         
         # 分析每列的数据类型
         column_types = {}
         for original_col, clean_col in column_mapping.items():
-            values = [row.get(original_col) for row in sample_data]
-            column_types[clean_col] = self.infer_column_type(values)
-        
-        # 保存列类型映射
-        self.column_types_mapping = column_types
+            column_types[clean_col] = self.infer_column_type_series(column_values[original_col])
         
         # 构建CREATE TABLE语句
         columns_def = []
@@ -495,26 +913,28 @@ class DataImporter:
             await conn.execute(create_sql)
             logger.info(f"表 {table_name} 创建成功")
         
-        return create_sql, column_mapping
+        return create_sql, column_mapping, column_types
 
-    async def create_table_from_data(self, table_name: str, data: List[Dict[str, Any]], 
-                                   drop_if_exists: bool = False) -> str:
+    async def create_table_from_data(self, table_name: str, 
+                                   data: Union[List[Dict[str, Any]], pd.DataFrame], 
+                                   drop_if_exists: bool = False) -> tuple:
         """
         根据数据自动创建表
         
         Args:
             table_name: 表名
-            data: 数据列表
+            data: 数据列表或DataFrame
             drop_if_exists: 是否删除已存在的表
             
         Returns:
-            CREATE TABLE语句
+            (CREATE TABLE语句, 列映射, 列类型映射)
         """
         return await self.create_table_from_sample(table_name, data, drop_if_exists)
     
     async def import_csv_file_large(self, file_path: str, table_name: str, 
                                   drop_if_exists: bool = False, batch_size: int = 1000,
-                                  delimiter: str = ',', encoding: str = 'utf-8') -> Dict[str, Any]:
+                                  delimiter: str = ',', encoding: str = 'utf-8',
+                                  use_transaction: bool = True) -> Dict[str, Any]:
         """
         导入大型CSV文件到PostgreSQL（分块处理）
         
@@ -525,37 +945,44 @@ class DataImporter:
             batch_size: 批量插入大小
             delimiter: CSV分隔符
             encoding: 文件编码
+            use_transaction: 是否在单个事务中导入（失败时整体回滚）
             
         Returns:
             导入结果统计
         """
         logger.info(f"开始分块导入大型CSV文件: {file_path}")
         
-        # 读取第一个块用于创建表结构
-        first_chunk = None
-        chunk_count = 0
+        encoding = self.detect_encoding(file_path, encoding)
+        
+        # 先读取少量行估算每行内存占用，确定数据块行数
+        chunk_size = self.chunk_size
         try:
-            for chunk in self.stream_csv_chunks(file_path, delimiter, encoding, 1000):
-                first_chunk = chunk
-                chunk_count += 1
-                logger.info(f"成功读取第一个数据块，包含 {len(chunk)} 行")
-                break
+            sample_df = next(self.stream_csv_chunks(file_path, delimiter, encoding, 1000), None)
+            chunk_size = self._calibrate_chunk_size(sample_df)
+            logger.info(f"数据块大小: {chunk_size} 行")
+        except Exception as e:
+            logger.warning(f"估算数据块大小失败，使用默认值 {chunk_size}: {e}")
+        
+        # 读取第一个块用于创建表结构，之后继续用同一个迭代器导入（文件只解析一遍）
+        chunks = self.stream_csv_chunks(file_path, delimiter, encoding, chunk_size)
+        try:
+            first_chunk = next(chunks, None)
+            if first_chunk is not None:
+                logger.info(f"成功读取第一个数据块，包含 {len(first_chunk)} 行")
         except Exception as e:
             logger.error(f"读取第一个数据块失败: {e}")
             raise ValueError(f"无法读取CSV文件第一个块: {e}")
         
-        if not first_chunk:
+        if first_chunk is None or first_chunk.empty:
             raise ValueError("CSV文件为空或无法解析")
         
         # 显示数据样本
-        logger.info(f"数据样本 - 列数: {len(first_chunk[0]) if first_chunk else 0}")
-        if first_chunk:
-            sample_row = first_chunk[0]
-            logger.info(f"列名样本: {list(sample_row.keys())[:10]}...")  # 显示前10列
+        logger.info(f"数据样本 - 列数: {len(first_chunk.columns)}")
+        logger.info(f"列名样本: {list(first_chunk.columns)[:10]}...")  # 显示前10列
         
         # 根据第一个块创建表
         try:
-            create_sql, column_mapping = await self.create_table_from_sample(
+            create_sql, column_mapping, column_types = await self.create_table_from_sample(
                 table_name, first_chunk, drop_if_exists
             )
         except Exception as e:
@@ -566,44 +993,47 @@ class DataImporter:
         total_rows = 0
         inserted_rows = 0
         
-        async with self.connection_pool.acquire() as conn:
-            # 准备插入语句
-            clean_columns = list(column_mapping.values())
-            placeholders = ', '.join(f'${i+1}' for i in range(len(clean_columns)))
-            columns_str = ', '.join(f'"{col}"' for col in clean_columns)
-            insert_sql = f'INSERT INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
+        # 列定义与COPY的目标列（顺序与每行的值元组一致）
+        schema = self._build_schema(column_mapping, column_types)
+        clean_columns = [clean_col for _, clean_col, _ in schema]
+        
+        processing_mode = "large_file_chunked"
+        # 所有列均为文本类型时无需逐值转换，由PostgreSQL直接解析整个文件
+        if all(column_type == "TEXT" or column_type.startswith("VARCHAR") for _, _, column_type in schema):
+            try:
+                inserted_rows = await self.import_csv_file_raw_copy(
+                    file_path, table_name, clean_columns, delimiter, encoding
+                )
+                total_rows = inserted_rows
+                processing_mode = "raw_copy"
+            except Exception as e:
+                logger.warning(f"直接COPY导入失败，改为逐块转换导入: {e}")
+        
+        if processing_mode == "raw_copy":
+            chunks.close()
+        else:
+            # 数据块的解析和按列类型转换在后台线程中进行
+            prepared_chunks = (
+                (len(chunk_df), self._convert_dataframe(chunk_df, schema))
+                for chunk_df in chain([first_chunk], chunks)
+            )
+            del first_chunk
             
-            # 重新开始分块读取所有数据
-            for chunk_data in self.stream_csv_chunks(file_path, delimiter, encoding, self.chunk_size):
-                chunk_size = len(chunk_data)
-                total_rows += chunk_size
-                
-                # 分批处理当前块
-                for i in range(0, chunk_size, batch_size):
-                    batch = chunk_data[i:i + batch_size]
-                    batch_values = []
-                    
-                    for row in batch:
-                        row_values = []
-                        for original_col in column_mapping.keys():
-                            clean_col = column_mapping[original_col]
-                            value = row.get(original_col)
-                            column_type = self.column_types_mapping.get(clean_col, "TEXT")
-                            
-                            # 处理空值并根据列类型转换
-                            if value == '' or pd.isna(value):
-                                converted_value = None
-                            else:
-                                converted_value = self.convert_value_by_type(value, column_type)
-                            row_values.append(converted_value)
-                        batch_values.append(tuple(row_values))
-                    
-                    # 执行批量插入
-                    await conn.executemany(insert_sql, batch_values)
-                    inserted_rows += len(batch)
-                
-                logger.info(f"已处理 {total_rows} 行，已插入 {inserted_rows} 行")
-                gc.collect()  # 手动垃圾回收
+            with self._gc_paused():
+                async with self._copy_session(table_name, clean_columns, use_transaction) as write_batches, \
+                        self._prefetch_in_thread(prepared_chunks, self.prefetch_chunks) as chunk_stream:
+                    # 第一个块与剩余数据块依次导入
+                    async for chunk_size, chunk_values in chunk_stream:
+                        total_rows += chunk_size
+                        
+                        # 分批写入当前块
+                        batches = [chunk_values[i:i + batch_size] for i in range(0, chunk_size, batch_size)]
+                        inserted_rows += await write_batches(batches)
+                        
+                        # 释放已写入的数据块
+                        del chunk_values, batches
+                        
+                        logger.info(f"已处理 {total_rows} 行，已插入 {inserted_rows} 行")
         
         result = {
             "file_path": file_path,
@@ -614,15 +1044,53 @@ class DataImporter:
             "column_mapping": column_mapping,
             "delimiter": delimiter,
             "encoding": encoding,
-            "processing_mode": "large_file_chunked",
+            "processing_mode": processing_mode,
             "status": "success"
         }
         
         logger.info(f"大型CSV文件导入完成: {inserted_rows} 行数据")
         return result
 
+    async def import_csv_file_raw_copy(self, file_path: str, table_name: str, columns: List[str],
+                                       delimiter: str = ',', encoding: str = 'utf-8') -> int:
+        """
+        由PostgreSQL直接解析CSV文件导入（COPY ... FORMAT csv），不经过pandas和逐值转换
+        
+        适用于所有列均为文本类型的文件；整个文件在一个事务中写入，
+        任何一行格式错误都会整体回滚，调用方可改用逐块转换导入
+        
+        Args:
+            file_path: CSV文件路径
+            table_name: 目标表名（需已创建）
+            columns: 目标列，顺序与文件中的列一致
+            delimiter: 分隔符
+            encoding: 文件编码
+            
+        Returns:
+            写入的行数
+        """
+        pg_encoding = _PG_ENCODINGS.get(codecs.lookup(encoding).name)
+        if pg_encoding is None:
+            raise ValueError(f"编码 {encoding} 不支持直接COPY")
+        
+        async with self.connection_pool.acquire() as conn:
+            async with conn.transaction():
+                # 提交时不等待WAL落盘
+                await conn.execute("SET LOCAL synchronous_commit = OFF")
+                with open(file_path, 'rb') as file:
+                    # 与逐块导入一致：空字段（含带引号的空字符串）写入NULL
+                    status = await conn.copy_to_table(
+                        table_name, source=file, columns=columns, format='csv',
+                        delimiter=delimiter, header=True, encoding=pg_encoding, force_null=columns
+                    )
+        
+        inserted_rows = int(status.split()[-1])
+        logger.info(f"直接COPY导入完成: {inserted_rows} 行")
+        return inserted_rows
+    
     async def import_json_file(self, file_path: str, table_name: str, 
-                             drop_if_exists: bool = False, batch_size: int = 1000) -> Dict[str, Any]:
+                             drop_if_exists: bool = False, batch_size: int = 1000,
+                             use_transaction: bool = True) -> Dict[str, Any]:
         """
         导入JSON文件到PostgreSQL
         
@@ -631,68 +1099,58 @@ class DataImporter:
             table_name: 目标表名
             drop_if_exists: 是否删除已存在的表
             batch_size: 批量插入大小
+            use_transaction: 是否在单个事务中导入（失败时整体回滚）
             
         Returns:
             导入结果统计
         """
-        # 检查JSON文件是否超过10GB限制
-        if self.is_json_too_large(file_path):
-            file_size_gb = self.get_file_size(file_path) / (1024**3)
-            raise ValueError(f"JSON文件过大 ({file_size_gb:.2f}GB)，超过10GB限制。JSON文件不支持流式处理，请使用较小的文件。")
-        
-        # 所有JSON文件都使用完整导入（不分流式处理）
+        # 流式解析JSON，内存占用与文件大小无关
         logger.info(f"开始导入JSON文件: {file_path}")
+        objects = self.stream_json_objects(file_path)
         
-        # 读取JSON文件
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 确保数据是列表格式
-        if isinstance(data, dict):
-            data = [data]
-        elif not isinstance(data, list):
-            raise ValueError("JSON文件必须包含对象或对象数组")
-        
-        if not data:
+        # 取前chunk_size个对象作为样本推断表结构，之后与剩余对象拼接继续读取
+        sample_data = list(islice(objects, self.chunk_size))
+        if not sample_data:
             raise ValueError("JSON文件为空")
+        if not all(isinstance(obj, dict) for obj in sample_data):
+            raise ValueError("JSON文件必须包含对象或对象数组")
         
         # 创建表
-        create_sql, column_mapping = await self.create_table_from_data(
-            table_name, data, drop_if_exists
+        create_sql, column_mapping, column_types = await self.create_table_from_data(
+            table_name, sample_data, drop_if_exists
         )
         
         # 批量插入数据
-        total_rows = len(data)
+        total_rows = 0
         inserted_rows = 0
         
-        async with self.connection_pool.acquire() as conn:
-            # 准备插入语句
-            clean_columns = list(column_mapping.values())
-            placeholders = ', '.join(f'${i+1}' for i in range(len(clean_columns)))
-            columns_str = ', '.join(f'"{col}"' for col in clean_columns)
-            insert_sql = f'INSERT INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
-            
-            # 分批插入
-            for i in range(0, total_rows, batch_size):
-                batch = data[i:i + batch_size]
-                batch_values = []
-                
-                for row in batch:
-                    row_values = []
-                    for original_col in column_mapping.keys():
-                        clean_col = column_mapping[original_col]
-                        value = row.get(original_col)
-                        column_type = self.column_types_mapping.get(clean_col, "TEXT")
-                        
-                        # 根据列类型转换值
-                        converted_value = self.convert_value_by_type(value, column_type)
-                        row_values.append(converted_value)
-                    batch_values.append(tuple(row_values))
+        # 列定义与COPY的目标列（顺序与每行的值元组一致）
+        schema = self._build_schema(column_mapping, column_types)
+        clean_columns = [clean_col for _, clean_col, _ in schema]
+        
+        with self._gc_paused():
+            async with self._copy_session(table_name, clean_columns, use_transaction) as write_batches:
+                # 分批插入，每次提交pool_max_size个批次
+                batches = []
+                rows = chain(sample_data, objects)
+                del sample_data
+                while True:
+                    batch = list(islice(rows, batch_size))
+                    if not batch:
+                        break
+                    total_rows += len(batch)
+                    batch_values = self._convert_records(batch, schema)
+                    batches.append(batch_values)
+                    del batch  # 原始对象已转换完毕
+                    
+                    if len(batches) >= self.pool_max_size:
+                        inserted_rows += await write_batches(batches)
+                        batches = []
+                        logger.info(f"已插入 {inserted_rows} 行")
                 
-                # 执行批量插入
-                await conn.executemany(insert_sql, batch_values)
-                inserted_rows += len(batch)
-                logger.info(f"已插入 {inserted_rows}/{total_rows} 行")
+                if batches:
+                    inserted_rows += await write_batches(batches)
+                    logger.info(f"已插入 {inserted_rows} 行")
         
         result = {
             "file_path": file_path,
@@ -701,7 +1159,7 @@ class DataImporter:
             "inserted_rows": inserted_rows,
             "create_sql": create_sql,
             "column_mapping": column_mapping,
-            "processing_mode": "complete_load",
+            "processing_mode": "streaming",
             "status": "success"
         }
         
@@ -710,7 +1168,8 @@ class DataImporter:
     
     async def import_csv_file(self, file_path: str, table_name: str, 
                             drop_if_exists: bool = False, batch_size: int = 1000,
-                            delimiter: str = ',', encoding: str = 'utf-8') -> Dict[str, Any]:
+                            delimiter: str = ',', encoding: str = 'utf-8',
+                            use_transaction: bool = True) -> Dict[str, Any]:
         """
         导入CSV文件到PostgreSQL
         
@@ -721,6 +1180,7 @@ class DataImporter:
             batch_size: 批量插入大小
             delimiter: CSV分隔符
             encoding: 文件编码
+            use_transaction: 是否在单个事务中导入（失败时整体回滚）
             
         Returns:
             导入结果统计
@@ -729,12 +1189,13 @@ class DataImporter:
         if self.is_large_file(file_path):
             logger.info(f"检测到大文件 ({self.get_file_size(file_path) / (1024**3):.2f}GB)，使用分块处理")
             return await self.import_csv_file_large(file_path, table_name, drop_if_exists, 
-                                                  batch_size, delimiter, encoding)
+                                                  batch_size, delimiter, encoding, use_transaction)
         
         # 原有的小文件处理逻辑
         logger.info(f"开始导入CSV文件: {file_path}")
         
         # 使用更宽松的参数读取CSV
+        encoding = self.detect_encoding(file_path, encoding)
         df = None
         for params in [
             {'delimiter': delimiter, 'encoding': encoding, 'on_bad_lines': 'skip'},
@@ -762,49 +1223,32 @@ class DataImporter:
             if df is None:
                 raise ValueError("无法解析CSV文件，请检查文件格式")
         
-        # 将DataFrame转换为字典列表
-        data = df.to_dict('records')
-        
         # 创建表
-        create_sql, column_mapping = await self.create_table_from_data(
-            table_name, data, drop_if_exists
+        create_sql, column_mapping, column_types = await self.create_table_from_data(
+            table_name, df, drop_if_exists
         )
         
         # 批量插入数据
-        total_rows = len(data)
+        total_rows = len(df)
         inserted_rows = 0
         
-        async with self.connection_pool.acquire() as conn:
-            # 准备插入语句
-            clean_columns = list(column_mapping.values())
-            placeholders = ', '.join(f'${i+1}' for i in range(len(clean_columns)))
-            columns_str = ', '.join(f'"{col}"' for col in clean_columns)
-            insert_sql = f'INSERT INTO "{table_name}" ({columns_str}) VALUES ({placeholders})'
-            
-            # 分批插入
+        # 列定义与COPY的目标列（顺序与每行的值元组一致）
+        schema = self._build_schema(column_mapping, column_types)
+        clean_columns = [clean_col for _, clean_col, _ in schema]
+        
+        # 整表按列类型转换
+        all_values = self._convert_dataframe(df, schema)
+        
+        async with self._copy_session(table_name, clean_columns, use_transaction) as write_batches:
+            # 分批插入，每次提交pool_max_size个批次
+            batches = []
             for i in range(0, total_rows, batch_size):
-                batch = data[i:i + batch_size]
-                batch_values = []
+                batches.append(all_values[i:i + batch_size])
                 
-                for row in batch:
-                    row_values = []
-                    for original_col in column_mapping.keys():
-                        clean_col = column_mapping[original_col]
-                        value = row.get(original_col)
-                        column_type = self.column_types_mapping.get(clean_col, "TEXT")
-                        
-                        # 处理pandas的NaN值并根据列类型转换
-                        if pd.isna(value):
-                            converted_value = None
-                        else:
-                            converted_value = self.convert_value_by_type(value, column_type)
-                        row_values.append(converted_value)
-                    batch_values.append(tuple(row_values))
-                
-                # 执行批量插入
-                await conn.executemany(insert_sql, batch_values)
-                inserted_rows += len(batch)
-                logger.info(f"已插入 {inserted_rows}/{total_rows} 行")
+                if len(batches) >= self.pool_max_size or i + batch_size >= total_rows:
+                    inserted_rows += await write_batches(batches)
+                    batches = []
+                    logger.info(f"已插入 {inserted_rows}/{total_rows} 行")
         
         result = {
             "file_path": file_path,
@@ -851,9 +1295,10 @@ class DataImporter:
         extension = file_path.suffix.lower()
         
         if extension == '.json':
-            # JSON文件只需要batch_size参数
+            # JSON文件只需要batch_size和use_transaction参数
             json_kwargs = {
-                'batch_size': kwargs.get('batch_size', 1000)
+                'batch_size': kwargs.get('batch_size', 1000),
+                'use_transaction': kwargs.get('use_transaction', True)
             }
             return await self.import_json_file(str(file_path), table_name, drop_if_exists, **json_kwargs)
         elif extension == '.csv':
@@ -861,22 +1306,13 @@ class DataImporter:
             csv_kwargs = {
                 'batch_size': kwargs.get('batch_size', 1000),
                 'delimiter': kwargs.get('delimiter', ','),
-                'encoding': kwargs.get('encoding', 'utf-8')
+                'encoding': kwargs.get('encoding', 'utf-8'),
+                'use_transaction': kwargs.get('use_transaction', True)
             }
             return await self.import_csv_file(str(file_path), table_name, drop_if_exists, **csv_kwargs)
         else:
             raise ValueError(f"不支持的文件格式: {extension}")
 
-def load_db_config():
-    """从环境变量加载数据库配置"""
-    return {
-        "host": os.getenv("POSTGRES_HOST", "localhost"),
-        "port": int(os.getenv("POSTGRES_PORT", "5432")),
-        "database": os.getenv("POSTGRES_DB", "postgres"),
-        "user": os.getenv("POSTGRES_USER", "postgres"),
-        "password": os.getenv("POSTGRES_PASSWORD", "")
-    }
-
 async def main():
     """主函数 - 命令行接口"""
     parser = argparse.ArgumentParser(description="数据导入工具 - 支持JSON和CSV导入到PostgreSQL")
@@ -888,6 +1324,8 @@ async def main():
     parser.add_argument("--encoding", default="utf-8", help="文件编码（默认为utf-8）")
     parser.add_argument("--chunk-size", type=int, default=10000, help="大文件处理时的块大小")
     parser.add_argument("--force-manual", action="store_true", help="强制使用手动解析模式")
+    parser.add_argument("--no-transaction", action="store_true", 
+                        help="不使用单个事务，各批次在多个连接上并发写入（失败时已写入的批次不回滚）")
     
     args = parser.parse_args()
     
@@ -904,12 +1342,8 @@ async def main():
         file_size_gb = importer.get_file_size(args.file_path) / (1024**3)
         file_extension = Path(args.file_path).suffix.lower()
         
-        if file_extension == '.json':
-            if file_size_gb > 10:
-                print(f"错误: JSON文件过大 ({file_size_gb:.2f}GB)，超过10GB限制")
-                return 1
-            elif file_size_gb > 1:
-                print(f"注意: JSON文件较大 ({file_size_gb:.2f}GB)，将完整加载到内存")
+        if file_extension == '.json' and file_size_gb > 1:
+            print(f"检测到大文件: {file_size_gb:.2f}GB，将使用流式解析")
         elif file_extension == '.csv' and file_size_gb > 1:
             print(f"检测到大文件: {file_size_gb:.2f}GB，将使用优化的流式处理")
         
@@ -918,7 +1352,8 @@ async def main():
         
         # 根据文件类型准备参数
         import_kwargs = {
-            'batch_size': args.batch_size
+            'batch_size': args.batch_size,
+            'use_transaction': not args.no_transaction
         }
         
         # 只有CSV文件才添加delimiter和encoding参数
@@ -7,12 +7,18 @@ import asyncio
 import asyncpg
 import json
 import logging
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, List, Optional, Union, Tuple, AsyncIterator
+from functools import lru_cache
 from datetime import datetime, date
-import pandas as pd
 from pathlib import Path
 import os
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO, 
@@ -20,18 +26,118 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 每个连接缓存的预备语句数量（asyncpg按SQL文本缓存，默认100）
+STATEMENT_CACHE_SIZE = 512
+
+# 可计算平均值/标准差的列类型（information_schema.columns.data_type）
+NUMERIC_DATA_TYPES = frozenset({
+    'smallint', 'integer', 'bigint', 'numeric', 'real', 'double precision', 'money'
+})
+
+# 文本列类型（search_text默认搜索的列）
+TEXT_DATA_TYPES = frozenset({'text', 'character varying', 'character', 'varchar'})
+
+# ensure_fts_index创建的全文检索表达式索引名后缀（索引名为 表名 + 后缀）
+FTS_INDEX_SUFFIX = '_fts_idx'
+
+# group_by_analysis允许的聚合函数
+AGG_FUNCTIONS = frozenset({'COUNT', 'SUM', 'AVG', 'MIN', 'MAX'})
+
+class QIdent(str):
+    """
+    经过校验的SQL标识符，quoted为加双引号后的形式
+    
+    中文、空格、大小写等均保留原样；名称中的双引号按SQL规则写成两个，
+    因此任何名称都无法跳出引号注入SQL。只拒绝空名称和包含NUL的名称
+    """
+    
+    __slots__ = ('quoted',)
+    
+    def __new__(cls, name: str) -> 'QIdent':
+        if not isinstance(name, str) or not name or '\x00' in name:
+            raise ValueError(f"非法的标识符: {name!r}")
+        ident = super().__new__(cls, name)
+        ident.quoted = '"' + name.replace('"', '""') + '"'
+        return ident
+
+# 相同名称只校验一次
+_qident = lru_cache(maxsize=1024)(QIdent)
+
+@lru_cache(maxsize=512)
+def _table_sql(schema: str, table_name: str) -> str:
+    """
+    生成带引号的完整表名（"schema"."table"）
+    
+    Args:
+        schema: 模式名称
+        table_name: 表名
+        
+    Returns:
+        完整表名
+    """
+    return f'{_qident(schema).quoted}.{_qident(table_name).quoted}'
+
+def _columns_sql(columns: List[str]) -> str:
+    """生成带引号的列名列表（"a", "b" ...）"""
+    return ', '.join(_qident(col).quoted for col in columns)
+
+@lru_cache(maxsize=512)
+def _where_sql(columns: Tuple[str, ...]) -> str:
+    """
+    生成等值查询条件（"a" = $1 AND "b" = $2 ...），相同的列组合只生成一次
+    
+    Args:
+        columns: 条件列名（顺序与参数一致）
+        
+    Returns:
+        WHERE子句（不含WHERE关键字）
+    """
+    return ' AND '.join(f'{_qident(column).quoted} = ${index}' for index, column in enumerate(columns, 1))
+
+def _json_default(obj):
+    """JSON导出时处理日期时间类型"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+def _encode_json(value: Any) -> str:
+    """json/jsonb参数编码（优先使用orjson），已序列化的字符串原样传入"""
+    if isinstance(value, str):
+        return value
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=_json_default).decode('utf-8')
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
+
+def _decode_json(text: str) -> Any:
+    """json/jsonb结果解码（优先使用orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def _dumps_json_row(row: Dict[str, Any]) -> bytes:
+    """序列化单行为JSON数组中的一个元素（与对整个列表json.dump(indent=2)的输出一致，优先使用orjson）"""
+    if ORJSON_AVAILABLE:
+        content = orjson.dumps(row, default=_json_default, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        content = json.dumps(row, ensure_ascii=False, indent=2, default=_json_default).encode('utf-8')
+    # 数组元素每行再缩进一级（JSON字符串内的换行已转义，可以按行处理）
+    return b'  ' + content.replace(b'\n', b'\n  ')
+
 class DatabaseQueryManager:
     """数据库查询管理器"""
     
-    def __init__(self, db_config: Dict[str, Any]):
+    def __init__(self, db_config: Dict[str, Any], decode_json: bool = False):
         """
         初始化数据库查询管理器
         
         Args:
             db_config: 数据库配置字典
+            decode_json: 是否将json/jsonb列解码为Python对象（默认与之前一样返回JSON字符串）
         """
         self.db_config = db_config
+        self.decode_json = decode_json
         self.connection_pool: Optional[asyncpg.Pool] = None
+        self.pool_max_size = 10  # 连接池最大连接数，也限制并发查询的工作协程数
     
     async def init_connection_pool(self):
         """初始化数据库连接池"""
@@ -39,14 +145,32 @@ class DatabaseQueryManager:
             self.connection_pool = await asyncpg.create_pool(
                 **self.db_config,
                 min_size=2,
-                max_size=10,
-                command_timeout=60
+                max_size=self.pool_max_size,
+                command_timeout=60,
+                statement_cache_size=STATEMENT_CACHE_SIZE,
+                init=self._init_connection
             )
             logger.info("数据库连接池初始化成功")
         except Exception as e:
             logger.error(f"初始化数据库连接池失败: {e}")
             raise
     
+    async def _init_connection(self, conn: asyncpg.Connection):
+        """
+        连接池新建连接时的初始化：注册json/jsonb编解码
+        
+        参数可以直接传入dict/list（字符串视为已序列化的JSON，原样传入）；
+        decode_json为True时查询结果解码为Python对象，否则返回JSON字符串
+        
+        Args:
+            conn: 新建的数据库连接
+        """
+        decoder = _decode_json if self.decode_json else str
+        for type_name in ('json', 'jsonb'):
+            await conn.set_type_codec(
+                type_name, encoder=_encode_json, decoder=decoder, schema='pg_catalog'
+            )
+    
     async def close_connection_pool(self):
         """关闭数据库连接池"""
         if self.connection_pool:
@@ -55,13 +179,15 @@ class DatabaseQueryManager:
     
     # ========== 基本查询功能 ==========
     
-    async def execute_query(self, sql: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+    async def execute_query(self, sql: str, params: Optional[tuple] = None,
+                            raw: bool = False) -> List[Dict[str, Any]]:
         """
         执行查询并返回结果
         
         Args:
             sql: SQL查询语句
             params: 查询参数
+            raw: 是否直接返回asyncpg的Record列表（可按列名索引，省去逐行转换为字典）
             
         Returns:
             查询结果列表
@@ -71,7 +197,7 @@ class DatabaseQueryManager:
                 rows = await conn.fetch(sql, *params)
             else:
                 rows = await conn.fetch(sql)
-            return [dict(row) for row in rows]
+            return rows if raw else [dict(row) for row in rows]
     
     async def execute_single_query(self, sql: str, params: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
         """
@@ -126,6 +252,37 @@ class DatabaseQueryManager:
                 result = await conn.execute(sql)
             return result
     
+    async def iter_select(self, sql: str, params: Optional[tuple] = None,
+                          prefetch: int = 10000) -> AsyncIterator[asyncpg.Record]:
+        """
+        流式执行查询，通过服务端游标每次读取prefetch行，不在内存中缓存整个结果集
+        
+        Args:
+            sql: SQL查询语句
+            params: 查询参数
+            prefetch: 每次从服务端读取的行数
+            
+        Yields:
+            查询结果行（asyncpg Record，可按列名索引）
+        """
+        async with self.connection_pool.acquire() as conn:
+            # 游标只能在事务中使用
+            async with conn.transaction():
+                async for record in conn.cursor(sql, *(params or ()), prefetch=prefetch):
+                    yield record
+    
+    async def execute_many_queries(self, queries: List[Tuple[str, Optional[tuple]]]) -> List[List[Dict[str, Any]]]:
+        """
+        并发执行多条互不依赖的查询（每条查询使用连接池中的独立连接）
+        
+        Args:
+            queries: (SQL查询语句, 查询参数) 列表
+            
+        Returns:
+            查询结果列表，顺序与queries一致
+        """
+        return await asyncio.gather(*(self.execute_query(sql, params) for sql, params in queries))
+    
     # ========== 表和数据库元信息查询 ==========
     
     async def list_tables(self, schema: str = 'public') -> List[Dict[str, Any]]:
@@ -175,14 +332,12 @@ class DatabaseQueryManager:
         if not table_info:
             return {}
         
-        # 获取列信息
-        columns_info = await self.get_table_columns(table_name, schema)
-        
-        # 获取表大小
-        size_info = await self.get_table_size(table_name, schema)
-        
-        # 获取行数
-        row_count = await self.get_table_row_count(table_name, schema)
+        # 并发获取列信息、表大小和行数
+        columns_info, size_info, row_count = await asyncio.gather(
+            self.get_table_columns(table_name, schema),
+            self.get_table_size(table_name, schema),
+            self.get_table_row_count(table_name, schema)
+        )
         
         return {
             **table_info,
@@ -191,13 +346,15 @@ class DatabaseQueryManager:
             'row_count': row_count
         }
     
-    async def get_table_columns(self, table_name: str, schema: str = 'public') -> List[Dict[str, Any]]:
+    async def get_table_columns(self, table_name: str, schema: str = 'public',
+                                raw: bool = False) -> List[Dict[str, Any]]:
         """
         获取表的列信息
         
         Args:
             table_name: 表名
             schema: 模式名称
+            raw: 是否返回Record列表（仅内部按列名读取时使用）
             
         Returns:
             列信息列表
@@ -214,7 +371,7 @@ class DatabaseQueryManager:
         WHERE table_schema = $1 AND table_name = $2
         ORDER BY ordinal_position
         """
-        return await self.execute_query(sql, (schema, table_name))
+        return await self.execute_query(sql, (schema, table_name), raw=raw)
     
     async def get_table_size(self, table_name: str, schema: str = 'public') -> Dict[str, Any]:
         """
@@ -233,21 +390,31 @@ class DatabaseQueryManager:
             pg_size_pretty(pg_relation_size($1)) as table_size,
             pg_size_pretty(pg_total_relation_size($1) - pg_relation_size($1)) as index_size
         """
-        full_table_name = f'"{schema}"."{table_name}"'
-        return await self.execute_single_query(sql, (full_table_name,))
+        return await self.execute_single_query(sql, (_table_sql(schema, table_name),))
     
-    async def get_table_row_count(self, table_name: str, schema: str = 'public') -> int:
+    async def get_table_row_count(self, table_name: str, schema: str = 'public',
+                                  exact: bool = False) -> int:
         """
         获取表的行数
         
+        默认读取pg_class.reltuples估算值（由VACUUM/ANALYZE维护，无需扫描全表）；
+        表从未分析过时估算值不可用，改为精确计数
+        
         Args:
             table_name: 表名
             schema: 模式名称
+            exact: 是否使用COUNT(*)精确计数
             
         Returns:
             行数
         """
-        sql = f'SELECT COUNT(*) FROM "{schema}"."{table_name}"'
+        if not exact:
+            estimate_sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass($1)"
+            estimate = await self.execute_scalar(estimate_sql, (_table_sql(schema, table_name),))
+            if estimate is not None and estimate > 0:
+                return estimate
+        
+        sql = f'SELECT COUNT(*) FROM {_table_sql(schema, table_name)}'
         return await self.execute_scalar(sql)
     
     # ========== 数据查询功能 ==========
@@ -265,9 +432,11 @@ class DatabaseQueryManager:
         Returns:
             查询结果
         """
-        sql = f'SELECT * FROM "{schema}"."{table_name}"'
+        sql = f'SELECT * FROM {_table_sql(schema, table_name)}'
         if limit:
-            sql += f' LIMIT {limit}'
+            # LIMIT作为参数传入，不同的limit复用同一条预备语句
+            sql += ' LIMIT $1'
+            return await self.execute_query(sql, (limit,))
         return await self.execute_query(sql)
     
     async def select_by_id(self, table_name: str, id_value: Any, 
@@ -284,7 +453,7 @@ class DatabaseQueryManager:
         Returns:
             查询结果或None
         """
-        sql = f'SELECT * FROM "{schema}"."{table_name}" WHERE "{id_column}" = $1'
+        sql = f'SELECT * FROM {_table_sql(schema, table_name)} WHERE {_qident(id_column).quoted} = $1'
         return await self.execute_single_query(sql, (id_value,))
     
     async def select_by_condition(self, table_name: str, conditions: Dict[str, Any],
@@ -306,22 +475,15 @@ class DatabaseQueryManager:
         if not conditions:
             return await self.select_all(table_name, schema, limit)
         
-        where_clauses = []
-        params = []
-        param_index = 1
-        
-        for column, value in conditions.items():
-            where_clauses.append(f'"{column}" = ${param_index}')
-            params.append(value)
-            param_index += 1
-        
-        sql = f'SELECT * FROM "{schema}"."{table_name}" WHERE {" AND ".join(where_clauses)}'
+        sql = f'SELECT * FROM {_table_sql(schema, table_name)} WHERE {_where_sql(tuple(conditions))}'
+        params = list(conditions.values())
         
         if order_by:
-            sql += f' ORDER BY "{order_by}"'
+            sql += f' ORDER BY {_qident(order_by).quoted}'
         
         if limit:
-            sql += f' LIMIT {limit}'
+            sql += f' LIMIT ${len(params) + 1}'
+            params.append(limit)
         
         return await self.execute_query(sql, tuple(params))
     
@@ -341,23 +503,17 @@ class DatabaseQueryManager:
         Returns:
             查询结果
         """
-        columns_str = ', '.join(f'"{col}"' for col in columns)
-        sql = f'SELECT {columns_str} FROM "{schema}"."{table_name}"'
+        columns_str = _columns_sql(columns)
+        sql = f'SELECT {columns_str} FROM {_table_sql(schema, table_name)}'
         
         params = []
         if conditions:
-            where_clauses = []
-            param_index = 1
-            
-            for column, value in conditions.items():
-                where_clauses.append(f'"{column}" = ${param_index}')
-                params.append(value)
-                param_index += 1
-            
-            sql += f' WHERE {" AND ".join(where_clauses)}'
+            sql += f' WHERE {_where_sql(tuple(conditions))}'
+            params = list(conditions.values())
         
         if limit:
-            sql += f' LIMIT {limit}'
+            sql += f' LIMIT ${len(params) + 1}'
+            params.append(limit)
         
         return await self.execute_query(sql, tuple(params) if params else None)
     
@@ -376,19 +532,12 @@ class DatabaseQueryManager:
         Returns:
             记录数
         """
-        sql = f'SELECT COUNT(*) FROM "{schema}"."{table_name}"'
+        sql = f'SELECT COUNT(*) FROM {_table_sql(schema, table_name)}'
         
         params = []
         if conditions:
-            where_clauses = []
-            param_index = 1
-            
-            for column, value in conditions.items():
-                where_clauses.append(f'"{column}" = ${param_index}')
-                params.append(value)
-                param_index += 1
-            
-            sql += f' WHERE {" AND ".join(where_clauses)}'
+            sql += f' WHERE {_where_sql(tuple(conditions))}'
+            params = list(conditions.values())
         
         return await self.execute_scalar(sql, tuple(params) if params else None)
     
@@ -405,15 +554,16 @@ class DatabaseQueryManager:
         Returns:
             列统计信息
         """
+        column = _qident(column_name).quoted
         sql = f"""
         SELECT 
             COUNT(*) as total_count,
-            COUNT("{column_name}") as non_null_count,
-            COUNT(*) - COUNT("{column_name}") as null_count,
-            COUNT(DISTINCT "{column_name}") as distinct_count,
-            MIN("{column_name}") as min_value,
-            MAX("{column_name}") as max_value
-        FROM "{schema}"."{table_name}"
+            COUNT({column}) as non_null_count,
+            COUNT(*) - COUNT({column}) as null_count,
+            COUNT(DISTINCT {column}) as distinct_count,
+            MIN({column}) as min_value,
+            MAX({column}) as max_value
+        FROM {_table_sql(schema, table_name)}
         """
         
         stats = await self.execute_single_query(sql)
@@ -422,10 +572,10 @@ class DatabaseQueryManager:
         try:
             numeric_sql = f"""
             SELECT 
-                AVG("{column_name}"::numeric) as avg_value,
-                STDDEV("{column_name}"::numeric) as stddev_value
-            FROM "{schema}"."{table_name}"
-            WHERE "{column_name}" IS NOT NULL
+                AVG({column}::numeric) as avg_value,
+                STDDEV({column}::numeric) as stddev_value
+            FROM {_table_sql(schema, table_name)}
+            WHERE {column} IS NOT NULL
             """
             numeric_stats = await self.execute_single_query(numeric_sql)
             stats.update(numeric_stats)
@@ -435,6 +585,83 @@ class DatabaseQueryManager:
         
         return stats
     
+    async def _get_columns_stats(self, table_name: str, columns_info: List[Dict[str, Any]],
+                                 schema: str = 'public') -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        一次表扫描获取所有列的统计信息
+        
+        Args:
+            table_name: 表名
+            columns_info: get_table_columns返回的列信息
+            schema: 模式名称
+            
+        Returns:
+            (总行数, 各列统计信息列表)，统计字段同get_column_stats，顺序与columns_info一致
+        """
+        # 以列序号作为别名，避免列名与别名冲突
+        select_items = ['COUNT(*) AS total_count']
+        for i, col_info in enumerate(columns_info):
+            column = _qident(col_info['column_name']).quoted
+            select_items += [
+                f'COUNT({column}) AS non_null_{i}',
+                f'COUNT(DISTINCT {column}) AS distinct_{i}',
+                f'MIN({column}) AS min_{i}',
+                f'MAX({column}) AS max_{i}'
+            ]
+            if col_info['data_type'] in NUMERIC_DATA_TYPES:
+                select_items += [
+                    f'AVG({column}::numeric) AS avg_{i}',
+                    f'STDDEV({column}::numeric) AS stddev_{i}'
+                ]
+        
+        sql = f'SELECT {", ".join(select_items)} FROM {_table_sql(schema, table_name)}'
+        row = await self.execute_single_query(sql)
+        
+        total_count = row['total_count']
+        all_stats = []
+        for i in range(len(columns_info)):
+            non_null_count = row[f'non_null_{i}']
+            all_stats.append({
+                'total_count': total_count,
+                'non_null_count': non_null_count,
+                'null_count': total_count - non_null_count,
+                'distinct_count': row[f'distinct_{i}'],
+                'min_value': row[f'min_{i}'],
+                'max_value': row[f'max_{i}'],
+                'avg_value': row.get(f'avg_{i}'),
+                'stddev_value': row.get(f'stddev_{i}')
+            })
+        return total_count, all_stats
+    
+    async def _collect_column_stats(self, table_name: str, column_names: List[str],
+                                    schema: str = 'public') -> List[Dict[str, Any]]:
+        """
+        逐列获取统计信息，多个工作协程从队列中取列并发查询
+        
+        工作协程数量小于连接池上限，始终为其他查询保留一个连接
+        
+        Args:
+            table_name: 表名
+            column_names: 列名列表
+            schema: 模式名称
+            
+        Returns:
+            各列统计信息列表，顺序与column_names一致
+        """
+        queue = asyncio.Queue()
+        for index, column_name in enumerate(column_names):
+            queue.put_nowait((index, column_name))
+        results = [None] * len(column_names)
+        
+        async def worker():
+            while not queue.empty():
+                index, column_name = queue.get_nowait()
+                results[index] = await self.get_column_stats(table_name, column_name, schema)
+        
+        worker_count = max(1, min(len(column_names), self.pool_max_size - 1))
+        await asyncio.gather(*(worker() for _ in range(worker_count)))
+        return results
+    
     async def group_by_analysis(self, table_name: str, group_column: str,
                                agg_column: Optional[str] = None, agg_func: str = 'COUNT',
                                schema: str = 'public', limit: Optional[int] = None) -> List[Dict[str, Any]]:
@@ -452,29 +679,36 @@ class DatabaseQueryManager:
         Returns:
             分组聚合结果
         """
+        agg_func = agg_func.upper()
+        if agg_func not in AGG_FUNCTIONS:
+            raise ValueError(f"不支持的聚合函数: {agg_func}")
+        
+        group = _qident(group_column).quoted
         if agg_column:
             sql = f"""
             SELECT 
-                "{group_column}",
-                {agg_func}("{agg_column}") as {agg_func.lower()}_value
-            FROM "{schema}"."{table_name}"
-            GROUP BY "{group_column}"
+                {group},
+                {agg_func}({_qident(agg_column).quoted}) as {agg_func.lower()}_value
+            FROM {_table_sql(schema, table_name)}
+            GROUP BY {group}
             ORDER BY {agg_func.lower()}_value DESC
             """
         else:
             sql = f"""
             SELECT 
-                "{group_column}",
+                {group},
                 COUNT(*) as count_value
-            FROM "{schema}"."{table_name}"
-            GROUP BY "{group_column}"
+            FROM {_table_sql(schema, table_name)}
+            GROUP BY {group}
             ORDER BY count_value DESC
             """
         
+        params = ()
         if limit:
-            sql += f' LIMIT {limit}'
+            sql += ' LIMIT $1'
+            params = (limit,)
         
-        return await self.execute_query(sql)
+        return await self.execute_query(sql, params)
     
     # ========== 搜索功能 ==========
     
@@ -495,11 +729,30 @@ class DatabaseQueryManager:
             搜索结果
         """
         if not search_columns:
+            fts_sql = """
+            SELECT pg_get_expr(indexprs, indrelid) FROM pg_index
+            WHERE indexrelid = to_regclass($1)
+            """
+            fts_expression, columns_info = await asyncio.gather(
+                self.execute_scalar(fts_sql, (_table_sql(schema, table_name + FTS_INDEX_SUFFIX),)),
+                self.get_table_columns(table_name, schema, raw=True)
+            )
+            
+            # 已通过ensure_fts_index建立全文检索索引时，使用与索引相同的表达式按词检索
+            if fts_expression:
+                sql = f"""
+                SELECT * FROM {_table_sql(schema, table_name)}
+                WHERE {fts_expression} @@ plainto_tsquery('simple', $1)
+                """
+                if limit:
+                    sql += ' LIMIT $2'
+                    return await self.execute_query(sql, (search_term, limit))
+                return await self.execute_query(sql, (search_term,))
+            
             # 获取所有文本类型的列
-            columns_info = await self.get_table_columns(table_name, schema)
             search_columns = [
                 col['column_name'] for col in columns_info
-                if col['data_type'] in ['text', 'character varying', 'character', 'varchar']
+                if col['data_type'] in TEXT_DATA_TYPES
             ]
         
         if not search_columns:
@@ -508,19 +761,94 @@ class DatabaseQueryManager:
         # 构建搜索条件
         search_conditions = []
         for col in search_columns:
-            search_conditions.append(f'"{col}"::text ILIKE $1')
+            search_conditions.append(f'{_qident(col).quoted}::text ILIKE $1')
         
         sql = f"""
-        SELECT * FROM "{schema}"."{table_name}"
+        SELECT * FROM {_table_sql(schema, table_name)}
         WHERE {" OR ".join(search_conditions)}
         """
         
+        search_pattern = f'%{search_term}%'
         if limit:
-            sql += f' LIMIT {limit}'
+            sql += ' LIMIT $2'
+            return await self.execute_query(sql, (search_pattern, limit))
         
-        search_pattern = f'%{search_term}%'
         return await self.execute_query(sql, (search_pattern,))
     
+    async def ensure_fts_index(self, table_name: str, columns: Optional[List[str]] = None,
+                               schema: str = 'public') -> str:
+        """
+        为表的文本列创建全文检索GIN表达式索引（已存在时跳过）
+        
+        索引建在to_tsvector表达式上，不新增列，表结构和SELECT *的结果都不变。
+        建立后search_text（未指定搜索列时）改用全文检索。'simple'配置按空白和标点分词，
+        只能按完整的词匹配，不适合未分词的中文；需要子串匹配时使用ensure_trgm_index
+        
+        Args:
+            table_name: 表名
+            columns: 参与检索的文本列（如果不指定，使用所有文本列）
+            schema: 模式名称
+            
+        Returns:
+            索引名称
+        """
+        if not columns:
+            columns_info = await self.get_table_columns(table_name, schema, raw=True)
+            columns = [
+                col['column_name'] for col in columns_info
+                if col['data_type'] in TEXT_DATA_TYPES
+            ]
+        
+        if not columns:
+            raise ValueError(f"表 {table_name} 没有可用于全文检索的文本列")
+        
+        document = " || ' ' || ".join(f"coalesce({_qident(col).quoted}, '')" for col in columns)
+        
+        # CONCURRENTLY建索引不阻塞写入（不能在事务中执行）
+        index_name = table_name + FTS_INDEX_SUFFIX
+        await self.execute_command(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {_qident(index_name).quoted} '
+            f"ON {_table_sql(schema, table_name)} USING GIN ((to_tsvector('simple', {document})))"
+        )
+        logger.info(f"表 {table_name} 全文检索索引已就绪: {index_name}")
+        return index_name
+    
+    async def ensure_trgm_index(self, table_name: str, columns: Optional[List[str]] = None,
+                                schema: str = 'public') -> List[str]:
+        """
+        为文本列创建pg_trgm三元组GIN索引（已存在时跳过）
+        
+        search_text的ILIKE子串搜索语义不变，可以直接使用这些索引
+        
+        Args:
+            table_name: 表名
+            columns: 要建立索引的文本列（如果不指定，使用所有文本列）
+            schema: 模式名称
+            
+        Returns:
+            索引名称列表
+        """
+        if not columns:
+            columns_info = await self.get_table_columns(table_name, schema, raw=True)
+            columns = [
+                col['column_name'] for col in columns_info
+                if col['data_type'] in TEXT_DATA_TYPES
+            ]
+        
+        await self.execute_command('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        
+        index_names = []
+        for col in columns:
+            index_name = f'{table_name}_{col}_trgm_idx'
+            await self.execute_command(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {_qident(index_name).quoted} '
+                f'ON {_table_sql(schema, table_name)} USING GIN ({_qident(col).quoted} gin_trgm_ops)'
+            )
+            index_names.append(index_name)
+        
+        logger.info(f"表 {table_name} 三元组索引已就绪: {index_names}")
+        return index_names
+    
     async def search_numeric_range(self, table_name: str, column_name: str,
                                   min_value: Optional[float] = None,
                                   max_value: Optional[float] = None,
@@ -540,32 +868,59 @@ class DatabaseQueryManager:
         Returns:
             搜索结果
         """
+        column = _qident(column_name).quoted
         conditions = []
         params = []
         param_index = 1
         
         if min_value is not None:
-            conditions.append(f'"{column_name}" >= ${param_index}')
+            conditions.append(f'{column} >= ${param_index}')
             params.append(min_value)
             param_index += 1
         
         if max_value is not None:
-            conditions.append(f'"{column_name}" <= ${param_index}')
+            conditions.append(f'{column} <= ${param_index}')
             params.append(max_value)
             param_index += 1
         
         if not conditions:
             return await self.select_all(table_name, schema, limit)
         
-        sql = f'SELECT * FROM "{schema}"."{table_name}" WHERE {" AND ".join(conditions)}'
+        sql = f'SELECT * FROM {_table_sql(schema, table_name)} WHERE {" AND ".join(conditions)}'
         
         if limit:
-            sql += f' LIMIT {limit}'
+            sql += f' LIMIT ${len(params) + 1}'
+            params.append(limit)
         
         return await self.execute_query(sql, tuple(params))
     
     # ========== 数据导出功能 ==========
     
+    def _build_select_sql(self, table_name: str, schema: str = 'public',
+                          columns: Optional[List[str]] = None,
+                          conditions: Optional[Dict[str, Any]] = None) -> Tuple[str, tuple]:
+        """
+        构建导出用的查询语句（与select_columns/select_by_condition的SQL一致）
+        
+        Args:
+            table_name: 表名
+            schema: 模式名称
+            columns: 要查询的列（不指定时查询所有列）
+            conditions: 查询条件
+            
+        Returns:
+            (SQL查询语句, 查询参数)
+        """
+        columns_str = _columns_sql(columns) if columns else '*'
+        sql = f'SELECT {columns_str} FROM {_table_sql(schema, table_name)}'
+        
+        params = []
+        if conditions:
+            sql += f' WHERE {_where_sql(tuple(conditions))}'
+            params = list(conditions.values())
+        
+        return sql, tuple(params)
+    
     async def export_to_csv(self, table_name: str, file_path: str,
                            schema: str = 'public', conditions: Optional[Dict[str, Any]] = None,
                            columns: Optional[List[str]] = None) -> Dict[str, Any]:
@@ -582,22 +937,22 @@ class DatabaseQueryManager:
         Returns:
             导出结果信息
         """
-        if columns:
-            data = await self.select_columns(table_name, columns, schema, conditions=conditions)
-        else:
-            data = await self.select_by_condition(table_name, conditions or {}, schema)
+        sql, params = self._build_select_sql(table_name, schema, columns, conditions)
         
-        if not data:
-            return {"status": "warning", "message": "没有数据可导出", "rows_exported": 0}
+        # 由服务端生成CSV（COPY ... TO STDOUT）并直接流式写入文件，不在内存中构造结果集
+        async with self.connection_pool.acquire() as conn:
+            status = await conn.copy_from_query(
+                sql, *params, output=file_path, format='csv', header=True, encoding='UTF8'
+            )
+        rows_exported = int(status.split()[-1])
         
-        # 转换为DataFrame并导出
-        df = pd.DataFrame(data)
-        df.to_csv(file_path, index=False, encoding='utf-8')
+        if not rows_exported:
+            return {"status": "warning", "message": "没有数据可导出", "rows_exported": 0}
         
         return {
             "status": "success",
             "message": f"数据已导出到 {file_path}",
-            "rows_exported": len(data),
+            "rows_exported": rows_exported,
             "file_path": file_path
         }
     
@@ -617,27 +972,25 @@ class DatabaseQueryManager:
         Returns:
             导出结果信息
         """
-        if columns:
-            data = await self.select_columns(table_name, columns, schema, conditions=conditions)
-        else:
-            data = await self.select_by_condition(table_name, conditions or {}, schema)
-        
-        if not data:
+        sql, params = self._build_select_sql(table_name, schema, columns, conditions)
+        
+        # 通过服务端游标逐行读取并写入JSON数组，内存占用与结果集大小无关
+        rows_exported = 0
+        with open(file_path, 'wb') as f:
+            f.write(b'[')
+            async for record in self.iter_select(sql, params):
+                f.write(b',\n' if rows_exported else b'\n')
+                f.write(_dumps_json_row(dict(record)))
+                rows_exported += 1
+            f.write(b'\n]' if rows_exported else b']')
+        
+        if not rows_exported:
             return {"status": "warning", "message": "没有数据可导出", "rows_exported": 0}
         
-        # 处理日期时间类型
-        def json_serializer(obj):
-            if isinstance(obj, (datetime, date)):
-                return obj.isoformat()
-            raise TypeError(f"Type {type(obj)} not serializable")
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=json_serializer)
-        
         return {
             "status": "success",
             "message": f"数据已导出到 {file_path}",
-            "rows_exported": len(data),
+            "rows_exported": rows_exported,
             "file_path": file_path
         }
     
@@ -654,8 +1007,19 @@ class DatabaseQueryManager:
         Returns:
             数据质量报告
         """
-        columns_info = await self.get_table_columns(table_name, schema)
-        total_rows = await self.get_table_row_count(table_name, schema)
+        columns_info = await self.get_table_columns(table_name, schema, raw=True)
+        
+        # 所有列的统计合并为一次表扫描；失败时（如某列类型不支持MIN/MAX）改为逐列并发统计
+        try:
+            total_rows, all_stats = await self._get_columns_stats(table_name, columns_info, schema)
+        except Exception as e:
+            logger.warning(f"合并统计查询失败，改为逐列统计: {e}")
+            total_rows, all_stats = await asyncio.gather(
+                self.get_table_row_count(table_name, schema, exact=True),
+                self._collect_column_stats(
+                    table_name, [col_info['column_name'] for col_info in columns_info], schema
+                )
+            )
         
         quality_report = {
             "table_name": table_name,
@@ -663,9 +1027,8 @@ class DatabaseQueryManager:
             "columns_analysis": []
         }
         
-        for col_info in columns_info:
+        for col_info, col_stats in zip(columns_info, all_stats):
             col_name = col_info['column_name']
-            col_stats = await self.get_column_stats(table_name, col_name, schema)
             
             null_percentage = (col_stats['null_count'] / total_rows * 100) if total_rows > 0 else 0
             unique_percentage = (col_stats['distinct_count'] / col_stats['non_null_count'] * 100) if col_stats['non_null_count'] > 0 else 0
@@ -702,11 +1065,11 @@ class DatabaseQueryManager:
         Returns:
             重复记录
         """
-        columns_str = ', '.join(f'"{col}"' for col in columns)
+        columns_str = _columns_sql(columns)
         
         sql = f"""
         SELECT {columns_str}, COUNT(*) as duplicate_count
-        FROM "{schema}"."{table_name}"
+        FROM {_table_sql(schema, table_name)}
         GROUP BY {columns_str}
         HAVING COUNT(*) > 1
         ORDER BY duplicate_count DESC
@@ -723,26 +1086,35 @@ class DatabaseQueryManager:
         Returns:
             数据库信息
         """
-        info = {}
-        
         # 数据库版本
         version_sql = "SELECT version()"
-        info['version'] = await self.execute_scalar(version_sql)
         
         # 数据库大小
         size_sql = "SELECT pg_size_pretty(pg_database_size(current_database()))"
-        info['database_size'] = await self.execute_scalar(size_sql)
         
         # 连接数
         connections_sql = "SELECT count(*) FROM pg_stat_activity"
-        info['active_connections'] = await self.execute_scalar(connections_sql)
         
         # 表数量
         tables_count_sql = """
         SELECT count(*) FROM information_schema.tables 
         WHERE table_schema = 'public' AND table_type = 'BASE TABLE'
         """
-        info['tables_count'] = await self.execute_scalar(tables_count_sql)
+        
+        # 各项查询互不依赖，使用独立连接并发执行
+        version, database_size, active_connections, tables_count = await asyncio.gather(
+            self.execute_scalar(version_sql),
+            self.execute_scalar(size_sql),
+            self.execute_scalar(connections_sql),
+            self.execute_scalar(tables_count_sql)
+        )
+        
+        info = {
+            'version': version,
+            'database_size': database_size,
+            'active_connections': active_connections,
+            'tables_count': tables_count
+        }
         
         return info
 
@@ -4,15 +4,33 @@
 """
 import asyncio
 import json
+import random
+import re
 import threading
 import time
 from datetime import datetime
+from collections import deque
 from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass
 from enum import Enum
 import uuid
 
 
+# 额外回复的关键词匹配（预编译为单个正则，每条消息只扫描一遍）
+WEATHER_PATTERN = re.compile("天气")
+TIME_PATTERN = re.compile("时间|几点")
+GREETING_PATTERN = re.compile("你好|hello|hi|嗨", re.IGNORECASE)
+
+# 主动输出的候选消息
+AUTO_MESSAGES = [
+    "💭 有什么我可以帮助您的吗？",
+    "🤔 我在这里等您的问题...",
+    "📚 您可以问我任何问题，我会尽力帮助您！",
+    "⭐ 今天过得怎么样？",
+    "🎯 有什么想聊的话题吗？"
+]
+
+
 class EventType(Enum):
     """事件类型枚举"""
     USER_INPUT = "user_input"
@@ -78,8 +96,13 @@ class ChatEventSystem:
         
         # 主动输出相关
         self.auto_output_enabled = True
-        self.last_user_input_time = None
+        self.last_user_input_time = None  # 用于状态展示
+        self._last_input_monotonic = None  # 用于空闲判断
+        self.auto_output_interval = 3600  # 两次主动输出的最小间隔（秒）
+        self._last_auto_output_monotonic = None
+        self._auto_output_wake = asyncio.Event()  # 用户输入或设置变化时唤醒主动输出任务
         self.idle_threshold = 30  # 30秒无输入后可以主动输出
+        self._auto_messages = deque(random.sample(AUTO_MESSAGES, len(AUTO_MESSAGES)))
         
         # 设置事件处理器
         self._setup_handlers()
@@ -101,6 +124,8 @@ class ChatEventSystem:
     async def _handle_user_input(self, event: ChatEvent):
         """处理用户输入事件"""
         self.last_user_input_time = datetime.now()
+        self._last_input_monotonic = time.monotonic()
+        self._auto_output_wake.set()
         user_input = event.content.strip()
         
         # 发出思考事件
@@ -128,15 +153,15 @@ class ChatEventSystem:
         responses.append(main_response)
         
         # 根据内容可能产生额外回复
-        if "天气" in user_input:
+        if WEATHER_PATTERN.search(user_input):
             responses.append("💡 提示：我可以为您查询更详细的天气信息，请告诉我具体的城市。")
         
-        if "时间" in user_input or "几点" in user_input:
+        if TIME_PATTERN.search(user_input):
             current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             responses.append(f"🕐 当前时间：{current_time}")
         
         # 如果是问候语，可能有友好的额外回复
-        if any(word in user_input.lower() for word in ["你好", "hello", "hi", "嗨"]):
+        if GREETING_PATTERN.search(user_input):
             responses.append("😊 很高兴和您聊天！有什么我可以帮助您的吗？")
         
         return responses
@@ -155,48 +180,53 @@ class ChatEventSystem:
     def _start_background_tasks(self):
         """启动后台任务"""
         # 主动输出任务
-        asyncio.create_task(self._auto_output_task())
+        self.tasks.append(asyncio.create_task(self._auto_output_task()))
         
         # 定期清理任务
-        asyncio.create_task(self._cleanup_task())
+        self.tasks.append(asyncio.create_task(self._cleanup_task()))
+    
+    def _seconds_until_auto_output(self) -> Optional[float]:
+        """计算距离下一次可能主动输出的秒数，None表示无需定时（等待唤醒）"""
+        if not self.auto_output_enabled or self._last_input_monotonic is None:
+            return None
+        
+        next_time = self._last_input_monotonic + self.idle_threshold
+        if self._last_auto_output_monotonic is not None:
+            next_time = max(next_time, self._last_auto_output_monotonic + self.auto_output_interval)
+        return max(0.0, next_time - time.monotonic())
     
     async def _auto_output_task(self):
-        """主动输出任务"""
+        """主动输出任务：休眠到下一次触发时间，期间被唤醒则重新计算"""
         while True:
-            await asyncio.sleep(3600)  # 每3600秒检查一次
-            
-            if not self.auto_output_enabled:
-                continue
+            self._auto_output_wake.clear()
+            try:
+                await asyncio.wait_for(self._auto_output_wake.wait(), timeout=self._seconds_until_auto_output())
+                continue  # 用户输入或设置变化，重新计算触发时间
+            except asyncio.TimeoutError:
+                pass
             
             # 检查是否应该主动输出
-            if await self._should_auto_output():
+            if self.auto_output_enabled and await self._should_auto_output():
+                self._last_auto_output_monotonic = time.monotonic()
                 message = await self._generate_auto_message()
                 if message:
                     await self.emit_bot_output(message)
     
     async def _should_auto_output(self) -> bool:
         """判断是否应该主动输出"""
-        if self.last_user_input_time is None:
+        if self._last_input_monotonic is None:
             return False
         
-        # 计算距离上次用户输入的时间
-        time_since_last_input = (datetime.now() - self.last_user_input_time).total_seconds()
+        # 计算距离上次用户输入的时间（单调时钟，不受系统时间调整影响）
+        time_since_last_input = time.monotonic() - self._last_input_monotonic
         
         # 如果超过阈值且队列为空，可以主动输出
-        return (time_since_last_input > self.idle_threshold)
+        return (time_since_last_input >= self.idle_threshold)
     
     async def _generate_auto_message(self) -> Optional[str]:
-        """生成主动输出的消息"""
-        auto_messages = [
-            "💭 有什么我可以帮助您的吗？",
-            "🤔 我在这里等您的问题...",
-            "📚 您可以问我任何问题，我会尽力帮助您！",
-            "⭐ 今天过得怎么样？",
-            "🎯 有什么想聊的话题吗？"
-        ]
-        
-        import random
-        return random.choice(auto_messages)
+        """生成主动输出的消息（轮换预先打乱的候选消息）"""
+        self._auto_messages.rotate(-1)
+        return self._auto_messages[0]
     
     async def _cleanup_task(self):
         """定期清理任务"""
@@ -272,7 +302,9 @@ class ChatEventSystem:
     def set_auto_output(self, enabled: bool):
         """设置是否启用主动输出"""
         self.auto_output_enabled = enabled
+        self._auto_output_wake.set()
     
     def set_idle_threshold(self, seconds: int):
         """设置空闲阈值（秒）"""
         self.idle_threshold = seconds
+        self._auto_output_wake.set()
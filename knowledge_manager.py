@@ -4,6 +4,27 @@ import re
 from typing import Dict, Optional, Any
 from datetime import datetime
 
+# 规则提取使用的正则（模块加载时预编译，按优先级排列）
+_NAME_PATTERNS = tuple(re.compile(p) for p in (
+    r"我叫([^\s，。！？,!?]+)",
+    r"我是([^\s，。！？,!?]+)",
+    r"叫我([^\s，。！？,!?]+)",
+    r"名字[是叫]([^\s，。！？,!?]+)",
+    r"^([^\s，。！？,!?]+)$"
+))
+_AGE_PATTERNS = tuple(re.compile(p) for p in (
+    r"(\d{1,2})[岁年]", r"我(\d{1,2})", r"今年(\d{1,2})", r"^(\d{1,2})$"
+))
+_MEASURE_RE = re.compile(r'(\d{2,3})')  # 身高/体重数值
+
+# 关键词组（每组编译为一个交替正则，一次扫描完成子串匹配）
+_REFUSAL_RE = re.compile("不|没")  # 覆盖 不想/不说/不知道/不清楚
+_NAME_CONTEXT_RE = re.compile("姓名|名字|称呼")
+_AGE_CONTEXT_RE = re.compile("年龄|多大|几岁")
+_GENDER_CONTEXT_RE = re.compile("性别|男生|女生")
+_MALE_RE = re.compile("男|boy|man|先生|帅哥")
+_FEMALE_RE = re.compile("女|girl|woman|小姐|美女")
+
 class KnowledgeManager:
     """用户知识管理器"""
     
@@ -130,29 +151,21 @@ class KnowledgeManager:
         user_response_lower = user_response.lower()
         
         # 检查是否拒绝回答
-        if any(word in user_response_lower for word in ["不", "没", "不想", "不说", "不知道", "不清楚"]):
+        if _REFUSAL_RE.search(user_response_lower):
             return {}
         
         # 姓名提取
-        if any(keyword in question_context for keyword in ["姓名", "名字", "称呼"]):
-            name_patterns = [
-                r"我叫([^\s，。！？,!?]+)",
-                r"我是([^\s，。！？,!?]+)",
-                r"叫我([^\s，。！？,!?]+)",
-                r"名字[是叫]([^\s，。！？,!?]+)",
-                r"^([^\s，。！？,!?]+)$"
-            ]
-            for pattern in name_patterns:
-                match = re.search(pattern, user_response)
+        if _NAME_CONTEXT_RE.search(question_context):
+            for pattern in _NAME_PATTERNS:
+                match = pattern.search(user_response)
                 if match:
                     extracted["name"] = match.group(1).strip()
                     break
         
         # 年龄提取
-        elif any(keyword in question_context for keyword in ["年龄", "多大", "几岁"]):
-            age_patterns = [r"(\d{1,2})[岁年]", r"我(\d{1,2})", r"今年(\d{1,2})", r"^(\d{1,2})$"]
-            for pattern in age_patterns:
-                match = re.search(pattern, user_response)
+        elif _AGE_CONTEXT_RE.search(question_context):
+            for pattern in _AGE_PATTERNS:
+                match = pattern.search(user_response)
                 if match:
                     age = int(match.group(1))
                     if 5 <= age <= 120:
@@ -160,10 +173,10 @@ class KnowledgeManager:
                         break
         
         # 性别提取
-        elif any(keyword in question_context for keyword in ["性别", "男生", "女生"]):
-            if any(word in user_response_lower for word in ["男", "boy", "man", "先生", "帅哥"]):
+        elif _GENDER_CONTEXT_RE.search(question_context):
+            if _MALE_RE.search(user_response_lower):
                 extracted["gender"] = "男"
-            elif any(word in user_response_lower for word in ["女", "girl", "woman", "小姐", "美女"]):
+            elif _FEMALE_RE.search(user_response_lower):
                 extracted["gender"] = "女"
         
         # 其他简单文本提取
@@ -189,14 +202,14 @@ class KnowledgeManager:
                     validated[key] = age
             elif key == "height" and isinstance(value, str):
                 # 确保身高格式正确
-                height_match = re.search(r'(\d{2,3})', str(value))
+                height_match = _MEASURE_RE.search(str(value))
                 if height_match:
                     height = int(height_match.group(1))
                     if 100 <= height <= 250:
                         validated[key] = f"{height}cm"
             elif key == "weight" and isinstance(value, str):
                 # 确保体重格式正确
-                weight_match = re.search(r'(\d{2,3})', str(value))
+                weight_match = _MEASURE_RE.search(str(value))
                 if weight_match:
                     weight = int(weight_match.group(1))
                     if 30 <= weight <= 300:
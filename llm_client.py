@@ -4,8 +4,22 @@
 """
 
 import json
-from typing import List, Dict, Optional, Any
-from openai import OpenAI
+import threading
+from typing import List, Dict, Optional, Any, Iterator, Tuple
+
+
+# 数据库函数调用表：函数名 -> 依次传给db_manager同名方法的(参数名, 默认值)
+# 可变默认值写成工厂函数（list/dict），每次调用新建，避免在多次调用间共享
+_DB_FUNCTION_ARGS = {
+    "execute_query": (("sql", None), ("params", list)),
+    "get_table_schema": (("table_name", None),),
+    "list_tables": (),
+    "search_records": (("table_name", None), ("conditions", dict), ("limit", 10)),
+    "insert_record": (("table_name", None), ("data", None)),
+    "update_record": (("table_name", None), ("data", None), ("conditions", None)),
+    "delete_record": (("table_name", None), ("conditions", None)),
+    "get_record_count": (("table_name", None), ("conditions", dict)),
+}
 
 
 class LLMClient:
@@ -19,8 +33,8 @@ class LLMClient:
             config: 配置对象，如果为None则自动加载
         """
         if config is None:
-            from config import ChatConfig
-            config = ChatConfig()
+            from config import CONFIG
+            config = CONFIG
         
         self.config = config
         self._client = None
@@ -30,10 +44,7 @@ class LLMClient:
         """初始化OpenAI客户端"""
         try:
             if self.config.API_KEY:
-                self._client = OpenAI(
-                    api_key=self.config.API_KEY,
-                    base_url=self.config.API_BASE_URL
-                )
+                self._client = get_openai_client(self.config.API_KEY, self.config.API_BASE_URL)
             else:
                 print("⚠️  警告: 未找到API密钥，LLM功能将不可用")
         except Exception as e:
@@ -84,6 +95,49 @@ class LLMClient:
             print(f"⚠️  LLM调用失败: {e}")
             return None
     
+    def chat_completion_stream(self, 
+                              messages: List[Dict[str, str]], 
+                              max_tokens: Optional[int] = None,
+                              temperature: Optional[float] = None,
+                              model: Optional[str] = None) -> Iterator[str]:
+        """
+        流式聊天完成接口，逐段返回生成的文本
+        
+        Args:
+            messages: 消息列表，格式为 [{"role": "user", "content": "..."}]
+            max_tokens: 最大token数
+            temperature: 温度参数
+            model: 模型名称
+            
+        Yields:
+            模型增量生成的文本片段
+            
+        Raises:
+            调用失败或中途断开时抛出异常，由调用方决定如何处理已输出的部分
+        """
+        if not self.is_available:
+            return
+        extra_body = {
+            "enable_thinking": False
+        }
+        
+        stream = self._client.chat.completions.create(
+            model=model or self.config.CHAT_MODEL_NAME,
+            messages=messages,
+            max_tokens=max_tokens or self.config.MAX_TOKENS,
+            temperature=temperature if temperature is not None else self.config.TEMPERATURE,
+            top_p=self.config.TOP_P,
+            extra_body=extra_body,
+            stream=True
+        )
+        
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    
     def chat_functional(self, 
                    user_message: str, 
                    system_prompt: Optional[str] = None,
@@ -184,49 +238,16 @@ class LLMClient:
             函数执行结果
         """
         print(f"🔍 执行函数: {function_name} with args: {arguments}")
+        arg_spec = _DB_FUNCTION_ARGS.get(function_name)
+        if arg_spec is None:
+            return {"error": f"未知函数: {function_name}"}
+        
         try:
-            if function_name == "execute_query":
-                sql = arguments.get("sql")
-                params = arguments.get("params", [])
-                return db_manager.execute_query(sql, params)
-                
-            elif function_name == "get_table_schema":
-                table_name = arguments.get("table_name")
-                return db_manager.get_table_schema(table_name)
-                
-            elif function_name == "list_tables":
-                return db_manager.list_tables()
-                
-            elif function_name == "search_records":
-                table_name = arguments.get("table_name")
-                conditions = arguments.get("conditions", {})
-                limit = arguments.get("limit", 10)
-                return db_manager.search_records(table_name, conditions, limit)
-                
-            elif function_name == "insert_record":
-                table_name = arguments.get("table_name")
-                data = arguments.get("data")
-                return db_manager.insert_record(table_name, data)
-                
-            elif function_name == "update_record":
-                table_name = arguments.get("table_name")
-                data = arguments.get("data")
-                conditions = arguments.get("conditions")
-                return db_manager.update_record(table_name, data, conditions)
-                
-            elif function_name == "delete_record":
-                table_name = arguments.get("table_name")
-                conditions = arguments.get("conditions")
-                return db_manager.delete_record(table_name, conditions)
-                
-            elif function_name == "get_record_count":
-                table_name = arguments.get("table_name")
-                conditions = arguments.get("conditions", {})
-                return db_manager.get_record_count(table_name, conditions)
-                
-            else:
-                return {"error": f"未知函数: {function_name}"}
-                
+            args = [
+                arguments[name] if name in arguments else (default() if callable(default) else default)
+                for name, default in arg_spec
+            ]
+            return getattr(db_manager, function_name)(*args)
         except Exception as e:
             return {"error": f"函数执行错误: {str(e)}"}
     
@@ -536,6 +557,32 @@ class LLMClient:
 # 全局LLM客户端实例
 _global_llm_client = None
 
+# 共享的OpenAI客户端，按 (api_key, base_url) 缓存，复用同一个HTTP连接池
+_openai_clients: Dict[Tuple[str, str], Any] = {}
+_openai_clients_lock = threading.Lock()
+
+
+def get_openai_client(api_key: str, base_url: str):
+    """
+    获取共享的OpenAI客户端（聊天与embedding复用同一连接池，避免重复握手）
+    
+    Args:
+        api_key: API密钥
+        base_url: API地址
+        
+    Returns:
+        OpenAI客户端实例
+    """
+    key = (api_key, base_url)
+    with _openai_clients_lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            # 延迟导入openai，未配置API密钥时不付出导入开销
+            from openai import OpenAI
+            client = OpenAI(api_key=api_key, base_url=base_url)
+            _openai_clients[key] = client
+        return client
+
 
 def get_llm_client(config=None) -> LLMClient:
     """
@@ -559,3 +606,5 @@ def reset_llm_client():
     """重置全局LLM客户端（用于测试或配置更新）"""
     global _global_llm_client
     _global_llm_client = None
+    with _openai_clients_lock:
+        _openai_clients.clear()
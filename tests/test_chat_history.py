@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+聊天历史存储测试脚本
+测试JSONL历史文件的加载、旧版迁移、损坏行处理、尾部读取和压缩
+"""
+
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ChatConfig
+from chatbot import ChatBot, _read_tail_lines
+
+
+def _record(i: int) -> dict:
+    return {"timestamp": f"2024-01-01T00:00:{i:02d}", "user": f"消息{i}"}
+
+
+def _write_jsonl(path: str, records) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _read_jsonl(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@contextmanager
+def temp_history(**overrides):
+    """把历史文件指向临时目录，关闭自动归档和历史搜索"""
+    tmp_dir = tempfile.mkdtemp()
+    settings = {
+        "CHAT_HISTORY_FILE": os.path.join(tmp_dir, "chat_history.jsonl"),
+        "LEGACY_CHAT_HISTORY_FILE": os.path.join(tmp_dir, "chat_history.json"),
+        "AUTO_ARCHIVE_ENABLED": False,
+        "ENABLE_HISTORY_SEARCH": False,
+    }
+    settings.update(overrides)
+    with patch.multiple(ChatConfig, **settings):
+        yield settings
+
+
+def open_bot() -> ChatBot:
+    return ChatBot()
+
+
+def close_bot(bot: ChatBot) -> None:
+    bot.stop_history_writer()
+    bot._shutdown_search_executor()
+
+
+def test_legacy_migration():
+    """测试旧版JSON数组历史迁移为JSONL"""
+    print("🧪 测试旧版历史迁移...")
+    
+    with temp_history() as settings:
+        records = [_record(i) for i in range(3)]
+        with open(settings["LEGACY_CHAT_HISTORY_FILE"], 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        
+        bot = open_bot()
+        try:
+            assert list(bot.chat_history) == records
+        finally:
+            close_bot(bot)
+        
+        assert _read_jsonl(settings["CHAT_HISTORY_FILE"]) == records
+        assert os.path.exists(settings["LEGACY_CHAT_HISTORY_FILE"]), "旧版文件应保留"
+    
+    print("✅ 旧版历史迁移正确")
+    return True
+
+
+def test_truncated_last_line():
+    """测试写了一半的最后一行：跳过该行，新记录另起一行"""
+    print("🧪 测试损坏的最后一行...")
+    
+    with temp_history() as settings:
+        history_file = settings["CHAT_HISTORY_FILE"]
+        records = [_record(i) for i in range(5)]
+        _write_jsonl(history_file, records)
+        with open(history_file, 'a', encoding='utf-8') as f:
+            f.write('{"timestamp": "2024-01-01T00:00:0')  # 模拟追加时进程崩溃
+        
+        bot = open_bot()
+        try:
+            assert list(bot.chat_history) == records
+            bot.add_to_history("user", "新消息")
+        finally:
+            close_bot(bot)
+        
+        bot = open_bot()
+        try:
+            assert len(bot.chat_history) == 6
+            assert bot.chat_history[-1]["user"] == "新消息"
+        finally:
+            close_bot(bot)
+    
+    print("✅ 损坏行被跳过，重启后记录完整")
+    return True
+
+
+def test_tail_read():
+    """测试只读取文件末尾的若干行"""
+    print("🧪 测试尾部读取...")
+    
+    with temp_history(MAX_HISTORY_LENGTH=10) as settings:
+        history_file = settings["CHAT_HISTORY_FILE"]
+        records = [_record(i) for i in range(15)]
+        _write_jsonl(history_file, records)
+        
+        # 空行不计入行数，返回顺序与文件一致
+        with open(history_file, 'a', encoding='utf-8') as f:
+            f.write("\n\n")
+        lines = _read_tail_lines(history_file, 12)
+        assert [json.loads(line) for line in lines] == records[-12:]
+        assert len(_read_tail_lines(history_file, 100)) == 15
+        
+        bot = open_bot()
+        try:
+            assert list(bot.chat_history) == records[-10:]
+        finally:
+            close_bot(bot)
+    
+    print("✅ 尾部读取正确")
+    return True
+
+
+def test_compaction():
+    """测试文件行数超过上限2倍时启动时压缩"""
+    print("🧪 测试历史文件压缩...")
+    
+    with temp_history(MAX_HISTORY_LENGTH=5) as settings:
+        history_file = settings["CHAT_HISTORY_FILE"]
+        records = [_record(i) for i in range(20)]
+        _write_jsonl(history_file, records)
+        
+        bot = open_bot()
+        try:
+            assert list(bot.chat_history) == records[-5:]
+        finally:
+            close_bot(bot)
+        
+        assert _read_jsonl(history_file) == records[-5:]
+    
+    print("✅ 历史文件已压缩")
+    return True
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        ("旧版历史迁移", test_legacy_migration),
+        ("损坏的最后一行", test_truncated_last_line),
+        ("尾部读取", test_tail_read),
+        ("历史文件压缩", test_compaction),
+    ]
+    
+    results = []
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"❌ 测试 '{test_name}' 出现异常: {e!r}")
+            results.append((test_name, False))
+    
+    passed = sum(1 for _, result in results if result)
+    print(f"\n总计: {passed}/{len(results)} 个测试通过")
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+数据导入器测试脚本（不需要数据库连接）
+测试JSON流式读取、列类型推断和按列类型转换
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_importer import DataImporter
+
+
+def _write_file(content: str, suffix: str = ".json") -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return path
+
+
+def _series(*values) -> pd.Series:
+    return pd.Series(list(values), dtype=object, name="col")
+
+
+def test_stream_json_objects():
+    """测试JSON数组、空数组、单个对象、JSONL和含错误行的JSONL"""
+    print("🧪 测试JSON流式读取...")
+    
+    importer = DataImporter({})
+    cases = [
+        ('[{"a": 1}, {"a": 2}]', [{"a": 1}, {"a": 2}]),
+        ('[]', []),
+        ('  \n[ ]\n', []),
+        ('{"a": 1}', [{"a": 1}]),
+        ('{"a": 1}\n{"a": 2}\n', [{"a": 1}, {"a": 2}]),
+        ('{"a": 1}\n{bad\n{"a": 3}\n', [{"a": 1}, {"a": 3}]),
+    ]
+    for content, expected in cases:
+        path = _write_file(content)
+        try:
+            assert list(importer.stream_json_objects(path)) == expected, content
+        finally:
+            os.remove(path)
+    
+    print("✅ JSON流式读取正确")
+    return True
+
+
+def test_import_empty_json_array():
+    """测试空数组文件报告为空文件（在访问数据库之前失败）"""
+    print("🧪 测试空JSON数组...")
+    
+    importer = DataImporter({})
+    path = _write_file('[]')
+    try:
+        asyncio.run(importer.import_json_file(path, "empty_table"))
+        raise AssertionError("空JSON数组应报错")
+    except ValueError as e:
+        assert str(e) == "JSON文件为空", e
+    finally:
+        os.remove(path)
+    
+    print("✅ 空JSON数组报告为空文件")
+    return True
+
+
+def test_infer_column_type():
+    """测试混合取值列的类型推断"""
+    print("🧪 测试列类型推断...")
+    
+    importer = DataImporter({})
+    assert importer.infer_column_type_series(_series("1", "2", "")) == "INTEGER"
+    assert importer.infer_column_type_series(_series("99999999999", "1")) == "BIGINT"
+    assert importer.infer_column_type_series(_series("1", "2.5")) == "NUMERIC"
+    assert importer.infer_column_type_series(_series("true", "false", None)) == "BOOLEAN"
+    assert importer.infer_column_type_series(_series("2024-01-01", "2024-02-03 10:00")) == "TIMESTAMP"
+    assert importer.infer_column_type_series(_series("1", "abc")).startswith("VARCHAR")
+    
+    print("✅ 列类型推断正确")
+    return True
+
+
+def test_convert_series_by_type():
+    """测试按列类型整列转换：空值为None，无法转换的值为None"""
+    print("🧪 测试按列类型转换...")
+    
+    importer = DataImporter({})
+    convert = importer.convert_series_by_type
+    
+    assert convert(_series("1", " 2 ", "", None, "x"), "INTEGER").tolist() == [1, 2, None, None, None]
+    # 超过2^53的整数不能经过float转换
+    assert convert(_series("9007199254740993", "1"), "BIGINT").tolist() == [9007199254740993, 1]
+    assert convert(_series("1.5", "2", "bad"), "NUMERIC").tolist() == [1.5, 2.0, None]
+    assert convert(_series("true", "0", "yes", ""), "BOOLEAN").tolist() == [True, False, True, None]
+    assert convert(_series("2024-01-01", "bad", "2024-02-03 10:00"), "TIMESTAMP").tolist() == [
+        datetime(2024, 1, 1), None, datetime(2024, 2, 3, 10, 0)
+    ]
+    assert convert(_series(1, "a", ""), "VARCHAR(10)").tolist() == ["1", "a", None]
+    
+    # 与逐个转换的结果一致
+    values = _series("3", "4.0", "", "abc")
+    expected = [
+        None if value == "" else importer.convert_value_by_type(value, "NUMERIC")
+        for value in values
+    ]
+    assert convert(values, "NUMERIC").tolist() == expected
+    
+    print("✅ 按列类型转换正确")
+    return True
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        ("JSON流式读取", test_stream_json_objects),
+        ("空JSON数组", test_import_empty_json_array),
+        ("列类型推断", test_infer_column_type),
+        ("按列类型转换", test_convert_series_by_type),
+    ]
+    
+    results = []
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"❌ 测试 '{test_name}' 出现异常: {e!r}")
+            results.append((test_name, False))
+    
+    passed = sum(1 for _, result in results if result)
+    print(f"\n总计: {passed}/{len(results)} 个测试通过")
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@
 """
 
 import asyncio
+import json
 import sys
 import os
 from pathlib import Path
@@ -128,6 +129,40 @@ async def test_export_functionality():
         print(f"❌ 导出功能测试失败: {e}")
         return False
 
+async def test_json_codec():
+    """测试json/jsonb编解码（不需要数据库连接）"""
+    print("\n" + "=" * 60)
+    print("测试json/jsonb编解码...")
+    
+    try:
+        from db_query_manager import _encode_json
+        
+        # 参数方向：dict/list序列化，已序列化的字符串原样传入（不会被二次编码）
+        assert _encode_json('{"a": 1}') == '{"a": 1}'
+        assert json.loads(_encode_json({"a": [1, "中文"]})) == {"a": [1, "中文"]}
+        print("✅ 参数编码正确")
+        
+        # 结果方向：默认返回JSON字符串，decode_json=True时返回Python对象
+        codecs = {}
+        
+        class FakeConnection:
+            async def set_type_codec(self, type_name, encoder, decoder, schema):
+                codecs[type_name] = decoder
+        
+        await DatabaseQueryManager({})._init_connection(FakeConnection())
+        assert codecs['json']('{"a": 1}') == '{"a": 1}'
+        assert codecs['jsonb']('[1, 2]') == '[1, 2]'
+        
+        await DatabaseQueryManager({}, decode_json=True)._init_connection(FakeConnection())
+        assert codecs['json']('{"a": 1}') == {"a": 1}
+        assert codecs['jsonb']('[1, 2]') == [1, 2]
+        print("✅ 结果解码正确")
+        return True
+        
+    except Exception as e:
+        print(f"❌ json/jsonb编解码测试失败: {e!r}")
+        return False
+
 async def main():
     """主测试函数"""
     print("🔍 数据库查询工具测试")
@@ -147,6 +182,7 @@ async def main():
         ("数据库连接", test_database_connection),
         ("基本查询", test_basic_queries),
         ("导出功能", test_export_functionality),
+        ("json/jsonb编解码", test_json_codec),
     ]
     
     results = []
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+查询缓存测试脚本
+测试QueryCache的LRU淘汰和TTL过期
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_db_manager import QueryCache
+
+
+def test_lru_eviction():
+    """测试超出容量时淘汰最久未使用的条目"""
+    print("🧪 测试LRU淘汰...")
+    
+    cache = QueryCache(max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # 访问a，b成为最久未使用
+    cache.put("c", 3)
+    
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    
+    # 重复写入同一个键只更新值，不占用额外容量
+    cache.put("a", 10)
+    assert len(cache) == 2
+    assert cache.get("a") == 10
+    
+    cache.clear()
+    assert len(cache) == 0
+    
+    print("✅ LRU淘汰正确")
+    return True
+
+
+def test_ttl_expiry():
+    """测试过期条目不再返回并被移除"""
+    print("🧪 测试TTL过期...")
+    
+    with patch("vector_db_manager.time.monotonic") as monotonic:
+        monotonic.return_value = 100.0
+        cache = QueryCache(max_size=10, ttl=5)
+        cache.put("a", 1)
+        
+        monotonic.return_value = 104.0
+        assert cache.get("a") == 1
+        
+        monotonic.return_value = 106.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+    
+    print("✅ TTL过期正确")
+    return True
+
+
+def main():
+    """主测试函数"""
+    tests = [
+        ("LRU淘汰", test_lru_eviction),
+        ("TTL过期", test_ttl_expiry),
+    ]
+    
+    results = []
+    for test_name, test_func in tests:
+        try:
+            results.append((test_name, test_func()))
+        except Exception as e:
+            print(f"❌ 测试 '{test_name}' 出现异常: {e!r}")
+            results.append((test_name, False))
+    
+    passed = sum(1 for _, result in results if result)
+    print(f"\n总计: {passed}/{len(results)} 个测试通过")
+    return 0 if passed == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,11 @@
 import os
 import json
 import hashlib
+import threading
+import time
+from collections import OrderedDict
 from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime
-import numpy as np
 
 try:
     from pymilvus import (
@@ -24,6 +26,12 @@ except ImportError:
     MILVUS_AVAILABLE = False
     print("⚠️  PyMilvus未安装，向量数据库功能将不可用")
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 try:
     from openai import OpenAI
     EMBEDDING_AVAILABLE = True
@@ -32,6 +40,66 @@ except ImportError:
     print("⚠️  OpenAI客户端未安装，文本嵌入功能将不可用")
 
 
+def _dumps_metadata(metadata: Optional[Dict[str, Any]]) -> str:
+    """序列化元数据为JSON字符串（优先使用orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(metadata or {}, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(metadata or {}, ensure_ascii=False)
+
+
+def _loads_metadata(text: str) -> Dict[str, Any]:
+    """解析JSON字符串格式的元数据（优先使用orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+class QueryCache:
+    """查询结果缓存（LRU淘汰 + TTL过期，线程安全）"""
+    
+    def __init__(self, max_size: int = 512, ttl: float = 600):
+        """
+        初始化查询缓存
+        
+        Args:
+            max_size: 最大缓存条数，超出时淘汰最久未使用的条目
+            ttl: 缓存有效期（秒）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (过期时间, 值)
+        self._lock = threading.RLock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存值，未命中或已过期时返回None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def put(self, key: str, value: Any):
+        """写入缓存"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        """清空缓存（数据变更后调用）"""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 class VectorDBManager:
     """向量数据库管理器"""
     
@@ -43,8 +111,8 @@ class VectorDBManager:
             config: 配置对象
         """
         if config is None:
-            from config import ChatConfig
-            config = ChatConfig()
+            from config import CONFIG
+            config = CONFIG
             
         self.config = config
         self.collection_name = getattr(config, 'MILVUS_COLLECTION_NAME', 'chat_agent_test')
@@ -55,6 +123,11 @@ class VectorDBManager:
         self.collection = None
         self.embedding_client = None
         self._is_connected = False
+        # 文本嵌入缓存：同一文本的向量在多处使用时只请求一次embedding API（向量与库内数据无关，不随归档清空）
+        self._embedding_cache = QueryCache(
+            max_size=getattr(config, 'EMBEDDING_CACHE_SIZE', 256),
+            ttl=getattr(config, 'EMBEDDING_CACHE_TTL', 3600)
+        )
         
         # 初始化
         self._initialize_embedding_client()
@@ -69,10 +142,9 @@ class VectorDBManager:
         try:
             # 使用硅基流动的embedding API
             if hasattr(self.config, 'API_KEY') and self.config.API_KEY:
-                self.embedding_client = OpenAI(
-                    api_key=self.config.API_KEY,
-                    base_url=self.config.API_BASE_URL
-                )
+                # 与聊天LLM共用同一个OpenAI客户端及其连接池
+                from llm_client import get_openai_client
+                self.embedding_client = get_openai_client(self.config.API_KEY, self.config.API_BASE_URL)
                 print(f"✅ Embedding API客户端初始化成功")
             else:
                 print("⚠️  未找到API密钥，embedding功能将不可用")
@@ -179,8 +251,11 @@ class VectorDBManager:
             
         if self.embedding_client is None:
             # 如果没有嵌入客户端，返回随机向量（仅用于测试）
-            np.random.seed(hash(text) % 2**32)
-            return np.random.rand(self.dim).tolist()
+            return self._random_embedding(text)
+        
+        embedding = self._embedding_cache.get(text)
+        if embedding is not None:
+            return embedding
         
         try:
             # 使用硅基流动的embedding API
@@ -192,13 +267,65 @@ class VectorDBManager:
             )
             
             embedding = response.data[0].embedding
+            self._embedding_cache.put(text, embedding)
             return embedding
             
         except Exception as e:
             print(f"⚠️  文本嵌入失败: {e}")
             # 失败时返回随机向量作为fallback
-            np.random.seed(hash(text) % 2**32)
-            return np.random.rand(self.dim).tolist()
+            return self._random_embedding(text)
+    
+    def _random_embedding(self, text: str) -> List[float]:
+        """生成与文本绑定的随机向量（仅用于测试/降级），numpy只在需要时导入"""
+        import numpy as np
+        np.random.seed(hash(text) % 2**32)
+        return np.random.rand(self.dim).tolist()
+    
+    def get_embeddings(self, texts: List[str], batch_size: int = 32) -> List[Optional[List[float]]]:
+        """
+        批量获取文本的向量嵌入，每批文本只发起一次API请求（已缓存的文本不再请求）
+        
+        Args:
+            texts: 输入文本列表
+            batch_size: 每次请求的文本数量
+            
+        Returns:
+            与输入一一对应的向量嵌入列表，空文本对应None
+        """
+        embeddings = [None] * len(texts)
+        valid_indexes = [i for i, text in enumerate(texts) if text.strip()]
+        
+        if self.embedding_client is None:
+            # 如果没有嵌入客户端，返回随机向量（仅用于测试）
+            for i in valid_indexes:
+                embeddings[i] = self._random_embedding(texts[i])
+            return embeddings
+        
+        pending_indexes = []
+        for i in valid_indexes:
+            embeddings[i] = self._embedding_cache.get(texts[i])
+            if embeddings[i] is None:
+                pending_indexes.append(i)
+        
+        embedding_model = getattr(self.config, 'EMBEDDING_MODEL_NAME', 'BAAI/bge-m3')
+        for start in range(0, len(pending_indexes), batch_size):
+            batch_indexes = pending_indexes[start:start + batch_size]
+            try:
+                response = self.embedding_client.embeddings.create(
+                    model=embedding_model,
+                    input=[texts[i] for i in batch_indexes],
+                    encoding_format="float"
+                )
+                for i, item in zip(batch_indexes, sorted(response.data, key=lambda d: d.index)):
+                    embeddings[i] = item.embedding
+                    self._embedding_cache.put(texts[i], item.embedding)
+            except Exception as e:
+                print(f"⚠️  批量文本嵌入失败: {e}")
+                # 失败时返回随机向量作为fallback
+                for i in batch_indexes:
+                    embeddings[i] = self._random_embedding(texts[i])
+        
+        return embeddings
     
     def save_data(self, 
                   content: str, 
@@ -240,7 +367,7 @@ class VectorDBManager:
                 [data_id],  # id
                 [content],  # content
                 [content_type],  # content_type
-                [json.dumps(metadata or {}, ensure_ascii=False)],  # metadata
+                [_dumps_metadata(metadata)],  # metadata
                 [timestamp],  # timestamp
                 [embedding]  # embedding
             ]
@@ -256,6 +383,71 @@ class VectorDBManager:
             print(f"⚠️  数据保存失败: {e}")
             return None
     
+    def save_data_batch(self, 
+                        contents: List[str], 
+                        content_type: str = "text",
+                        metadatas: List[Dict[str, Any]] = None) -> List[Optional[str]]:
+        """
+        批量保存数据到向量数据库（批量获取嵌入，一次插入并刷新）
+        
+        Args:
+            contents: 内容文本列表
+            content_type: 内容类型
+            metadatas: 与内容一一对应的元数据列表
+            
+        Returns:
+            与输入一一对应的数据ID列表，保存失败的条目为None
+        """
+        data_ids = [None] * len(contents)
+        if not self.is_available:
+            print("⚠️  向量数据库不可用")
+            return data_ids
+        
+        if metadatas is None:
+            metadatas = [None] * len(contents)
+        
+        try:
+            embeddings = self.get_embeddings(contents)
+            timestamp = datetime.now().isoformat()
+            
+            indexes, ids, rows_content, rows_metadata, rows_embedding = [], [], [], [], []
+            for i, (content, metadata, embedding) in enumerate(zip(contents, metadatas, embeddings)):
+                if embedding is None:
+                    print(f"⚠️  无法获取文本嵌入，跳过第 {i+1} 条")
+                    continue
+                content_hash = hashlib.md5(content.encode('utf-8')).hexdigest()
+                indexes.append(i)
+                # 同一批次共用时间戳，加入序号避免相同内容产生重复ID
+                ids.append(f"{content_type}_{timestamp}_{i}_{content_hash[:8]}")
+                rows_content.append(content)
+                rows_metadata.append(_dumps_metadata(metadata))
+                rows_embedding.append(embedding)
+            
+            if not ids:
+                return data_ids
+            
+            entities = [
+                ids,  # id
+                rows_content,  # content
+                [content_type] * len(ids),  # content_type
+                rows_metadata,  # metadata
+                [timestamp] * len(ids),  # timestamp
+                rows_embedding  # embedding
+            ]
+            
+            # 一次插入所有数据，只刷新一次
+            self.collection.insert(entities)
+            self.collection.flush()
+            
+            for i, data_id in zip(indexes, ids):
+                data_ids[i] = data_id
+            print(f"✅ 批量保存成功: {len(ids)} 条数据")
+            
+        except Exception as e:
+            print(f"⚠️  批量数据保存失败: {e}")
+        
+        return data_ids
+    
     def search_similar(self, 
                       query_text: str, 
                       limit: int = 5,
@@ -314,7 +506,7 @@ class VectorDBManager:
                     # 检查相似度阈值
                     if hit.score >= similarity_threshold:
                         try:
-                            metadata = json.loads(hit.entity.get('metadata', '{}'))
+                            metadata = _loads_metadata(hit.entity.get('metadata', '{}'))
                         except:
                             metadata = {}
                             
@@ -363,7 +555,7 @@ class VectorDBManager:
             formatted_results = []
             for result in results:
                 try:
-                    metadata = json.loads(result.get('metadata', '{}'))
+                    metadata = _loads_metadata(result.get('metadata', '{}'))
                 except:
                     metadata = {}
                     
@@ -462,16 +654,17 @@ class VectorDBManager:
                 print("⚠️  聊天历史解析失败，跳过归档")
                 return True
             
-            # 保存分析后的段落
-            success_count = 0
+            # 构建所有段落的内容和元数据，批量保存
             total_segments = len(analyzed_segments)
+            contents = []
+            metadatas = []
             
             for i, segment in enumerate(analyzed_segments):
                 # 构建段落内容
-                content = f"主题: {segment['topic']}\n\n总结:\n{segment['summary']}"
+                contents.append(f"主题: {segment['topic']}\n\n总结:\n{segment['summary']}")
                 
                 # 构建元数据
-                metadata = {
+                metadatas.append({
                     "archive_timestamp": archive_timestamp,
                     "segment_index": i,
                     "total_segments": total_segments,
@@ -483,15 +676,17 @@ class VectorDBManager:
                     "end_time": segment.get('end_time', ''),
                     "keywords": segment.get('keywords', []),
                     "importance_score": segment.get('importance_score', 0.5)
-                }
-                
-                # 保存到向量数据库
-                result = self.save_data(
-                    content=content,
-                    content_type="chat_topic_archive",
-                    metadata=metadata
-                )
-                
+                })
+            
+            # 保存到向量数据库（一次批量嵌入请求 + 一次插入）
+            results = self.save_data_batch(
+                contents=contents,
+                content_type="chat_topic_archive",
+                metadatas=metadatas
+            )
+            
+            success_count = 0
+            for i, (segment, result) in enumerate(zip(analyzed_segments, results)):
                 if result:
                     success_count += 1
                     print(f"✅ 保存主题段落 {i+1}/{total_segments}: {segment['topic']}")
@@ -520,20 +715,18 @@ class VectorDBManager:
             return []
         
         try:
-            # 构建聊天历史文本 - 适配新的单一消息格式
-            conversation_text = ""
-            current_user_msg = ""
+            # 构建聊天历史文本 - 适配新的单一消息格式（收集片段后一次拼接）
+            parts = []
             
             for i, chat_item in enumerate(chat_history):
-                timestamp = chat_item.get("timestamp", f"消息{i+1}")
-                
                 if "user" in chat_item:
-                    current_user_msg = chat_item["user"]
-                    conversation_text += f"[{timestamp}]\n用户: {current_user_msg}\n"
+                    timestamp = chat_item.get("timestamp", f"消息{i+1}")
+                    parts.append(f"[{timestamp}]\n用户: {chat_item['user']}\n")
                 elif "assistant" in chat_item or "assistent" in chat_item:
                     assistant_msg = chat_item.get("assistant", chat_item.get("assistent", ""))
-                    conversation_text += f"助手: {assistant_msg}\n\n"
+                    parts.append(f"助手: {assistant_msg}\n\n")
             
+            conversation_text = "".join(parts)
             if not conversation_text.strip():
                 print("⚠️  没有有效的对话内容可分析")
                 return []
@@ -601,7 +794,8 @@ class VectorDBManager:
             print(f"⚠️  聊天历史分析失败: {e}")
             return []
 
-    def search_related_chat_history(self, query: str, limit: int = 5) -> List[Dict]:
+    def search_related_chat_history(self, query: str, limit: int = 5,
+                                    query_embedding: Optional[List[float]] = None) -> List[Dict]:
         """
         搜索与查询相关的历史聊天记录
         优先搜索主题化的归档，然后搜索原始归档
@@ -609,6 +803,7 @@ class VectorDBManager:
         Args:
             query: 查询文本
             limit: 返回结果数量限制
+            query_embedding: 已计算好的查询向量，为None时根据query获取
             
         Returns:
             相关的聊天历史记录列表
@@ -618,7 +813,8 @@ class VectorDBManager:
         
         try:
             # 获取查询的向量嵌入
-            query_embedding = self.get_embedding(query)
+            if query_embedding is None:
+                query_embedding = self.get_embedding(query)
             if query_embedding is None:
                 return []
             
@@ -657,7 +853,7 @@ class VectorDBManager:
                 for hit in results[0]:
                     if hit.distance > similarity_threshold:
                         try:
-                            metadata = json.loads(hit.entity.get('metadata', '{}'))
+                            metadata = _loads_metadata(hit.entity.get('metadata', '{}'))
                             chat_record = {
                                 'content': hit.entity.get('content', ''),
                                 'score': hit.distance,
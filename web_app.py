@@ -8,7 +8,7 @@ import os
 import requests
 import hashlib
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 
 from chatbot import ChatBot
 from event_system import ChatEventSystem, EventType, ChatEvent
@@ -23,7 +23,15 @@ templates = Jinja2Templates(directory="templates")
 # 全局聊天机器人实例和事件系统
 chat_bot = None
 event_system = None
-active_connections: List[WebSocket] = []
+active_connections: Set[WebSocket] = set()
+
+# /api/chat 支持的特殊命令
+HELP_COMMANDS = frozenset({'/help', 'help', '帮助'})
+CLEAR_COMMANDS = frozenset({'/clear', 'clear', '清除'})
+
+# TTS服务地址及复用连接的HTTP会话（避免每次请求重新建立TCP连接）
+TTS_BASE_URL = "http://localhost:8000"
+tts_session = requests.Session()
 
 # 请求和响应模型
 class ChatMessage(BaseModel):
@@ -69,7 +77,7 @@ def synthesize_speech(text, language="zh"):
             return f"/static/audio/speech_{text_hash}.wav"
         
         # 调用语音合成API
-        url = "http://localhost:8000/tts"
+        url = f"{TTS_BASE_URL}/tts"
         payload = {
             "text": text,
             "text_language": language,
@@ -79,7 +87,7 @@ def synthesize_speech(text, language="zh"):
             "top_p": 0.6
         }
         
-        response = requests.post(url, json=payload, timeout=60)
+        response = tts_session.post(url, json=payload, timeout=60)
         
         if response.status_code == 200:
             with open(output_file, "wb") as f:
@@ -99,12 +107,11 @@ def synthesize_speech(text, language="zh"):
 # WebSocket连接管理
 async def add_connection(websocket: WebSocket):
     """添加WebSocket连接"""
-    active_connections.append(websocket)
+    active_connections.add(websocket)
 
 async def remove_connection(websocket: WebSocket):
     """移除WebSocket连接"""
-    if websocket in active_connections:
-        active_connections.remove(websocket)
+    active_connections.discard(websocket)
 
 async def broadcast_to_all(message_data: dict):
     """向所有活跃连接广播消息"""
@@ -114,7 +121,8 @@ async def broadcast_to_all(message_data: dict):
     # 创建需要移除的连接列表
     disconnected = []
     
-    for connection in active_connections:
+    # 遍历快照，避免发送过程中连接集合被修改
+    for connection in tuple(active_connections):
         try:
             await connection.send_json(message_data)
         except Exception:
@@ -190,9 +198,10 @@ async def chat(message: ChatMessage):
         user_input = message.message.strip()
         
         # 通过事件系统处理（但同步等待结果）
-        if user_input.lower() in ['/help', 'help', '帮助']:
+        command = user_input.lower()
+        if command in HELP_COMMANDS:
             response = "这里是帮助信息..."
-        elif user_input.lower() in ['/clear', 'clear', '清除']:
+        elif command in CLEAR_COMMANDS:
             bot.clear_history()
             response = "聊天历史已清除"
         else:
@@ -254,7 +263,7 @@ async def get_status():
         # 检查TTS服务状态
         tts_available = False
         try:
-            tts_response = requests.get("http://localhost:8000/health", timeout=5)
+            tts_response = tts_session.get(f"{TTS_BASE_URL}/health", timeout=5)
             tts_available = tts_response.status_code == 200
         except:
             tts_available = False